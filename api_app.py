@@ -4,6 +4,7 @@ from flask import Flask, jsonify
 from pymongo import MongoClient
 from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_cors import CORS
+from config import Config
 
 # Configure logging
 logging.basicConfig(
@@ -37,6 +38,12 @@ except Exception as e:
 # Make db available to other modules
 app.db = db
 
+# Shared scraping services, warmed once per process instead of per request. Warm-up and
+# embedded job workers start with the first request this process serves, not on import
+from container import ServiceContainer
+app.services = ServiceContainer(db)
+app.before_request(app.services.start)
+
 # API Routes
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -51,9 +58,7 @@ def health_check():
 def list_adapters():
     """List all available scraping adapters"""
     try:
-        from adapters import AdapterManager
-        adapter_manager = AdapterManager()
-        adapters = adapter_manager.list_adapters()
+        adapters = app.services.adapter_manager.list_adapters()
         return jsonify({'adapters': adapters})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -71,9 +76,7 @@ def search_urls():
         if not query:
             return jsonify({'error': 'Query is required'}), 400
         
-        from scraper_engine import ScraperEngine
-        scraper = ScraperEngine()
-        results = scraper.search_duckduckgo(query, max_results)
+        results = app.services.scraper_engine.search_duckduckgo(query, max_results)
         
         return jsonify({'results': results})
     except Exception as e:
@@ -91,12 +94,14 @@ def create_job():
     try:
         data = request.json
         job_type = data.get('type', 'scrape')
+        priority = data.get('priority') or Config.DEFAULT_JOB_PRIORITY
+        if priority not in Config.JOB_PRIORITIES:
+            return jsonify({'error': f"priority must be one of {', '.join(Config.JOB_PRIORITIES)}"}), 400
         
         from models import ScrapingJob
-        from tasks import TaskManager
         
         job_model = ScrapingJob(db)
-        task_manager = TaskManager(db)
+        task_manager = app.services.task_manager
         
         if job_type == 'search':
             query = data.get('query', '')
@@ -108,10 +113,11 @@ def create_job():
             job_id = job_model.create_job({
                 'type': 'search',
                 'query': query,
-                'max_results': max_results
+                'max_results': max_results,
+                'priority': priority
             })
             
-            task_manager.start_search_task(job_id, query, max_results)
+            task_manager.start_search_task(job_id, query, max_results, priority)
             
         else:
             urls = data.get('urls', [])
@@ -125,10 +131,13 @@ def create_job():
                 'type': 'scrape',
                 'urls': urls,
                 'adapter_name': adapter_name,
-                'task_type': task_type
+                'task_type': task_type,
+                'extraction_tier': data.get('extraction_tier'),
+                'priority': priority
             })
             
-            task_manager.start_scraping_task(job_id, urls, adapter_name, task_type)
+            task_manager.start_scraping_task(job_id, urls, adapter_name, task_type, data.get('cache'),
+                                             data.get('extraction_tier'), priority)
         
         return jsonify({'job_id': job_id, 'status': 'started'})
         
@@ -143,9 +152,7 @@ def get_job_status(job_id):
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        from tasks import TaskManager
-        task_manager = TaskManager(db)
-        job = task_manager.get_task_status(job_id)
+        job = app.services.task_manager.get_task_status(job_id)
         
         if not job:
             return jsonify({'error': 'Job not found'}), 404
@@ -188,4 +195,7 @@ def get_stats():
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # The reloader's serving child starts right away; the watching parent never serves
+        app.services.start()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
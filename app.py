@@ -52,7 +52,11 @@ except Exception as e:
             self._data.append(doc.copy())
             return type('Result', (), {'inserted_id': doc_id})()
             
-        def find(self, query=None):
+        def insert_many(self, docs, ordered=True):
+            inserted_ids = [self.insert_one(doc).inserted_id for doc in docs]
+            return type('Result', (), {'inserted_ids': inserted_ids})()
+            
+        def find(self, query=None, projection=None):
             return MockCursor(self._data)
             
         def find_one(self, query=None):
@@ -101,6 +105,12 @@ except Exception as e:
 # Store database reference for global access
 app.db = db
 
+# Shared scraping services, warmed once per process instead of per request. Warm-up and
+# embedded job workers start with the first request this process serves, not on import
+from container import ServiceContainer
+app.services = ServiceContainer(db)
+app.before_request(app.services.start)
+
 # Add CORS support for React frontend
 CORS(app, origins=["http://localhost:3000", "http://localhost:5173"])
 
@@ -0,0 +1,129 @@
+import asyncio
+import random
+import logging
+from typing import Dict, List, Optional, Tuple
+import httpx
+from config import Config
+from response_cache import get_response_cache, resolve_cache_policy
+from parsed_page import ParsedPage
+from governor import get_governor
+from host_scheduler import HostScheduler
+
+logger = logging.getLogger(__name__)
+
+class AsyncFetcher:
+    """Concurrent static fetcher built on httpx and asyncio"""
+
+    def __init__(self, headers: Dict, user_agents: Optional[List[str]] = None,
+                 max_in_flight: Optional[int] = None, scheduler: Optional[HostScheduler] = None):
+        self.headers = dict(headers)
+        # Background revalidations wait for a politeness slot from the same hosts as the fetches
+        self.scheduler = scheduler or HostScheduler()
+        self.user_agents = user_agents or [self.headers.get('User-Agent', Config.DEFAULT_USER_AGENT)]
+        self.max_in_flight = max_in_flight or Config.MAX_IN_FLIGHT_REQUESTS
+        self.client = None
+        self.revalidations = {}
+
+    async def __aenter__(self):
+        limits = httpx.Limits(
+            max_connections=self.max_in_flight,
+            max_keepalive_connections=self.max_in_flight
+        )
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=Config.REQUEST_TIMEOUT,
+            follow_redirects=True,
+            limits=limits
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # Let stale-while-revalidate refreshes finish before the client goes away
+        if self.revalidations:
+            await asyncio.gather(*self.revalidations.values(), return_exceptions=True)
+        await self.client.aclose()
+        self.client = None
+
+    async def fetch(self, url: str, adapter_config: Optional[Dict] = None) -> Optional[ParsedPage]:
+        """Fetch a page without blocking the event loop, via the response cache"""
+        try:
+            policy = resolve_cache_policy(adapter_config)
+            if policy['bypass']:
+                return (await self._fetch_and_cache(url, store=False))[0]
+
+            page, entry = self._from_cache(url, policy)
+            if page:
+                return page
+
+            page, not_modified = await self._fetch_and_cache(url, entry)
+            get_response_cache().record('revalidated' if not_modified else 'misses',
+                                        entry if not_modified else None)
+            return page
+        except Exception as e:
+            logger.error(f"Async fetching failed for {url}: {e}")
+            return None
+
+    def from_cache(self, url: str, adapter_config: Optional[Dict] = None) -> Optional[ParsedPage]:
+        """Serve a fresh (or stale, revalidating) cached page; None means it needs a network fetch"""
+        try:
+            policy = resolve_cache_policy(adapter_config)
+            if policy['bypass']:
+                return None
+            return self._from_cache(url, policy)[0]
+        except Exception as e:
+            logger.error(f"Cache lookup failed for {url}: {e}")
+            return None
+
+    def _from_cache(self, url: str, policy: Dict) -> Tuple[Optional[ParsedPage], Optional[Dict]]:
+        """Return (page, None) for a servable entry, else (None, entry to revalidate or None)"""
+        cache = get_response_cache()
+        entry = cache.lookup(url, self.headers)
+        if entry:
+            state = cache.freshness(entry, policy)
+            if state == 'fresh':
+                cache.record('hits', entry)
+                return ParsedPage(url, raw=entry['body'], encoding=entry['encoding']), None
+            if state == 'stale':
+                cache.record('stale_served', entry)
+                self.revalidate_in_background(url, entry)
+                return ParsedPage(url, raw=entry['body'], encoding=entry['encoding']), None
+        return None, entry
+
+    async def _fetch_and_cache(self, url: str, entry: Optional[Dict] = None,
+                               store: bool = True) -> Tuple[ParsedPage, bool]:
+        """GET a URL, conditionally if a cache entry exists; return (page, not_modified)"""
+        cache = get_response_cache()
+        headers = {'User-Agent': random.choice(self.user_agents)}
+        if entry:
+            headers.update(cache.conditional_headers(entry))
+        async with get_governor().http_slot_async():
+            response = await self.client.get(url, headers=headers)
+
+        if entry and response.status_code == 304:
+            cache.refresh(entry, response.headers)
+            return ParsedPage(url, raw=entry['body'], encoding=entry['encoding']), True
+
+        response.raise_for_status()
+        if store:
+            await asyncio.to_thread(cache.store, url, self.headers, response.headers,
+                                    response.content, response.encoding)
+        return ParsedPage(url, text=response.text, raw=response.content, encoding=response.encoding), False
+
+    def revalidate_in_background(self, url: str, entry: Dict):
+        """Refresh a stale cache entry without making the caller wait, as politely as any fetch"""
+        if entry['key'] in self.revalidations or len(self.revalidations) >= Config.CACHE_MAX_REVALIDATIONS:
+            return  # a later stale hit tries again
+
+        async def revalidate():
+            try:
+                await self.scheduler.acquire(url)
+                try:
+                    await self._fetch_and_cache(url, entry)
+                finally:
+                    await self.scheduler.release(url)
+            except Exception as e:
+                logger.warning(f"Background revalidation failed for {url}: {e}")
+            finally:
+                self.revalidations.pop(entry['key'], None)
+
+        self.revalidations[entry['key']] = asyncio.ensure_future(revalidate())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Contact extraction throughput per tier (fast / standard / full)
+Runs the same path as the extraction pool: parse, gate, batched NER, enrich.
+Uses a deterministic synthetic corpus unless --html-dir points at saved pages.
+Without the NER model, --ner-proxy times an untrained spaCy 'ner' pipe instead.
+
+Usage: python benchmark_extraction.py [--pages N] [--html-dir DIR] [--task-type lead|job] [--ner-proxy]
+"""
+
+import time
+import random
+import argparse
+from pathlib import Path
+from config import Config
+from parsed_page import ParsedPage
+from contact_extractor import ContactExtractor
+
+FIRST_NAMES = ['Jane', 'John', 'Maria', 'Wei', 'Amit', 'Sara', 'Tom', 'Lena', 'Omar', 'Grace']
+LAST_NAMES = ['Doe', 'Smith', 'Garcia', 'Chen', 'Patel', 'Johnson', 'Brown', 'Novak', 'Haddad', 'Lee']
+COMPANIES = ['Acme Corp', 'Globex', 'Initech', 'Umbrella Labs', 'Stark Industries', 'Wayne Enterprises']
+CITIES = ['Austin, TX', 'Boston, MA', 'Denver, CO', 'Seattle, WA', 'Chicago, IL']
+# The OntoNotes labels a small English model predicts, so the proxy's output layer has the same size
+NER_LABELS = ['PERSON', 'NORP', 'FAC', 'ORG', 'GPE', 'LOC', 'PRODUCT', 'EVENT', 'WORK_OF_ART', 'LAW',
+              'LANGUAGE', 'DATE', 'TIME', 'PERCENT', 'MONEY', 'QUANTITY', 'ORDINAL', 'CARDINAL']
+WORDS = ('the of and to in is for on with as by at from our we this that are be it your have more '
+         'product service customers team market data platform growth quality support solutions').split()
+
+def paragraph(rng, words=60):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+def contact_page(rng, i):
+    company = rng.choice(COMPANIES)
+    people = []
+    for _ in range(rng.randint(2, 6)):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        people.append(f"<li>{first} {last}: {first.lower()}.{last.lower()}@example{i}.org, "
+                      f"+1 (555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}</li>")
+    return (f"<html><head><title>{company} team</title></head><body><h1>About {company}</h1>"
+            f"<p>{paragraph(rng)}</p><div class='team'><ul>{''.join(people)}</ul></div>"
+            f"<footer class='contact'>{company}, {rng.choice(CITIES)} linkedin.com/in/{company.split()[0].lower()}"
+            f"</footer></body></html>")
+
+def article_page(rng, i):
+    body = ''.join(f"<p>{paragraph(rng, 120)}</p>" for _ in range(6))
+    return f"<html><head><title>Article {i}</title></head><body><article>{body}</article></body></html>"
+
+def job_page(rng, i):
+    company = rng.choice(COMPANIES)
+    low = rng.randint(60, 120)
+    return (f"<html><head><title>Engineer at {company}</title><script type='application/ld+json'>"
+            f"{{\"@type\": \"JobPosting\", \"hiringOrganization\": {{\"@type\": \"Organization\", "
+            f"\"name\": \"{company}\"}}}}</script></head><body><h1>Software Engineer</h1>"
+            f"<p>{company} is hiring in {rng.choice(CITIES)}. Salary ${low},000 - ${low + 30},000 per year.</p>"
+            f"<p>{paragraph(rng, 150)}</p><p>{paragraph(rng, 150)}</p></body></html>")
+
+def synthetic_corpus(count):
+    rng = random.Random(0)
+    builders = [contact_page, article_page, job_page]
+    return [builders[i % len(builders)](rng, i) for i in range(count)]
+
+def untrained_ner():
+    """Blank English pipeline with an untrained 'ner' pipe: a small model's per-token work, none of its accuracy"""
+    import spacy
+    nlp = spacy.blank('en')
+    ner = nlp.add_pipe('ner')
+    for label in NER_LABELS:
+        ner.add_label(label)
+    nlp.initialize()
+    return nlp
+
+def run_tier(extractor, documents, task_type, tier):
+    """Extract every document the way extraction_pool.extract_batch does; return pages/second"""
+    started = time.perf_counter()
+    for offset in range(0, len(documents), Config.NER_BATCH_SIZE):
+        pages = [ParsedPage(f"bench://{offset + i}", text=html)
+                 for i, html in enumerate(documents[offset:offset + Config.NER_BATCH_SIZE])]
+        extractor.annotate_pages([page for page in pages if extractor.gate_ner(page, task_type, tier)])
+        for page in pages:
+            extractor.enrich_scraped_data(page, {}, task_type, tier)
+    return len(documents) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=300, help='synthetic pages to generate')
+    parser.add_argument('--html-dir', help='benchmark saved .html files instead')
+    parser.add_argument('--task-type', default='lead', choices=['lead', 'job'])
+    parser.add_argument('--ner-proxy', action='store_true',
+                        help="without the NER model, time an untrained spaCy 'ner' pipe of the default architecture")
+    args = parser.parse_args()
+
+    if args.html_dir:
+        documents = [path.read_text(errors='replace') for path in sorted(Path(args.html_dir).glob('*.html'))]
+    else:
+        documents = synthetic_corpus(args.pages)
+
+    extractor = ContactExtractor()
+    model = Config.NER_MODEL if extractor.nlp else 'not available (standard/full measure no NER)'
+    if not extractor.nlp and args.ner_proxy:
+        extractor.nlp = untrained_ner()
+        model = "untrained 'ner' pipe (speed proxy; its entities are meaningless)"
+    print(f"NER model: {model}")
+    print(f"{len(documents)} pages, task type {args.task_type}")
+    run_tier(extractor, documents[:Config.NER_BATCH_SIZE], args.task_type, 'full')  # warm-up
+    for tier in Config.EXTRACTION_TIERS:
+        print(f"  {tier:<9} {run_tier(extractor, documents, args.task_type, tier):8.1f} pages/s")
+
+if __name__ == '__main__':
+    main()
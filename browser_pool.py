@@ -0,0 +1,339 @@
+import asyncio
+import atexit
+import threading
+import logging
+from concurrent.futures import CancelledError
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+from config import Config
+from governor import Share, SharedLimit, current_share, get_governor
+
+try:
+    import psutil
+except ImportError:
+    # RSS-based recycling is skipped without psutil
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+def to_playwright_selector(selector: str) -> str:
+    """Translate an adapter selector into Playwright selector syntax"""
+    if selector.startswith('.//'):
+        return 'xpath=' + selector[1:]
+    if selector.startswith('//'):
+        return 'xpath=' + selector
+    return selector
+
+def wait_conditions(adapter_config: Optional[Dict]) -> Tuple[List[str], bool]:
+    """Derive (selectors, require_all) that mark a rendered page as ready.
+
+    An adapter can list fields or raw selectors under "wait_for"; otherwise
+    fields flagged "required" must all match, and failing that the page is
+    ready as soon as any adapter selector matches.
+    """
+    selectors_config = (adapter_config or {}).get('selectors', {})
+
+    wait_for = (adapter_config or {}).get('wait_for')
+    if wait_for:
+        selectors = [selectors_config.get(name, {}).get('selector', name) for name in wait_for]
+        return [to_playwright_selector(s) for s in selectors if s], True
+
+    required = [c.get('selector') for c in selectors_config.values() if c.get('required')]
+    if required:
+        return [to_playwright_selector(s) for s in required if s], True
+
+    selectors = [c.get('selector') for c in selectors_config.values()]
+    return [to_playwright_selector(s) for s in selectors if s], False
+
+class BrowserSlot:
+    """A pooled browser process with its current context"""
+
+    def __init__(self, browser, context, pids: Set[int]):
+        self.browser = browser
+        self.context = context
+        self.pids = pids
+        self.navigations = 0
+        self.active = 0
+        self.retiring = False
+
+    def rss_mb(self) -> float:
+        """Resident memory of the browser process tree in MB"""
+        if psutil is None:
+            return 0.0
+        total = 0
+        for pid in self.pids:
+            try:
+                process = psutil.Process(pid)
+                for member in [process] + process.children(recursive=True):
+                    total += member.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+class BrowserPool:
+    """Long-lived Playwright browsers shared by all dynamic fetches.
+
+    Playwright runs on a private event loop thread, so synchronous callers and
+    other event loops can both submit renders. Each render costs one tab.
+    """
+
+    def __init__(self, size: Optional[int] = None, tabs_per_browser: Optional[int] = None,
+                 max_navigations: Optional[int] = None, max_rss_mb: Optional[int] = None):
+        self.size = size or Config.BROWSER_POOL_SIZE
+        self.tabs_per_browser = tabs_per_browser or Config.BROWSER_TABS_PER_BROWSER
+        self.max_navigations = max_navigations or Config.BROWSER_MAX_NAVIGATIONS
+        self.max_rss_mb = max_rss_mb or Config.BROWSER_MAX_RSS_MB
+        if psutil is None:
+            logger.warning(f"psutil is not installed; browsers are not recycled above {self.max_rss_mb} MB")
+        self.slots: List[BrowserSlot] = []
+        self.playwright = None
+        self.loop = None
+        self.thread = None
+        self.start_lock = threading.Lock()
+        # Open tabs count against the process-wide governor unless this pool was sized explicitly
+        if size is None and tabs_per_browser is None:
+            self.tabs = get_governor().limit('browser')
+        else:
+            self.tabs = SharedLimit('browser', self.size * self.tabs_per_browser)
+        self.launch_lock = None
+
+    def start(self):
+        """Start the pool's event loop thread (browsers launch on first use)"""
+        with self.start_lock:
+            if self.loop is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, name='browser-pool', daemon=True)
+            self.thread.start()
+
+    def render(self, url: str, adapter_config: Optional[Dict] = None,
+               wait_time: float = 0, cancel_token=None) -> Optional[str]:
+        """Render a URL and return its HTML, blocking the calling thread.
+
+        Cancelling cancel_token closes the tab and returns None right away.
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._render(url, adapter_config, wait_time, current_share()),
+                                                  self.loop)
+        if cancel_token is None:
+            return future.result()
+        remove_callback = cancel_token.add_callback(future.cancel)
+        try:
+            return future.result()
+        except CancelledError:
+            logger.info(f"Render of {url} cancelled")
+            return None
+        finally:
+            remove_callback()
+
+    async def render_async(self, url: str, adapter_config: Optional[Dict] = None,
+                           wait_time: float = 0) -> Optional[str]:
+        """Render a URL from another event loop without blocking it; cancelling the caller closes the tab"""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._render(url, adapter_config, wait_time, current_share()),
+                                                  self.loop)
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        """Close all browsers and stop the pool thread"""
+        with self.start_lock:
+            if self.loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=30)
+            except Exception as e:
+                logger.error(f"Error shutting down browser pool: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
+            self.loop = None
+
+    def stats(self) -> dict:
+        """Snapshot of pool utilisation"""
+        return {
+            'browsers': len(self.slots),
+            'open_tabs': sum(slot.active for slot in self.slots),
+            'capacity': self.size * self.tabs_per_browser,
+            'rss_mb': round(sum(slot.rss_mb() for slot in self.slots), 1)
+        }
+
+    async def _render(self, url: str, adapter_config: Optional[Dict], wait_time: float,
+                      share: Optional[Share] = None) -> Optional[str]:
+        if self.launch_lock is None:
+            self.launch_lock = asyncio.Lock()
+
+        # Runs on the pool's loop thread, so the caller's job share is passed in
+        await self.tabs.acquire_async(share)
+        try:
+            try:
+                slot = await self._acquire_slot()
+            except Exception as e:
+                logger.error(f"Dynamic scraping failed for {url}: could not start browser: {e}")
+                return None
+
+            slot.active += 1
+            context = slot.context
+            page = None
+            try:
+                page = await context.new_page()
+                await self._block_heavy_requests(page, adapter_config)
+                await page.goto(url, wait_until='domcontentloaded', timeout=Config.REQUEST_TIMEOUT * 1000)
+                await self._wait_until_ready(page, adapter_config)
+                if wait_time:
+                    await page.wait_for_timeout(wait_time * 1000)
+                return await page.content()
+            except Exception as e:
+                logger.error(f"Dynamic scraping failed for {url}: {e}")
+                return None
+            finally:
+                slot.active -= 1
+                slot.navigations += 1
+                await self._close_page(page, context, slot)
+                await self._maybe_recycle(slot)
+        finally:
+            self.tabs.release()
+
+    async def _block_heavy_requests(self, page, adapter_config: Optional[Dict]):
+        """Abort images, fonts, media and tracker requests the extractors never need"""
+        blocked_types = set((adapter_config or {}).get('block_resources', Config.BLOCKED_RESOURCE_TYPES))
+
+        async def handle(route):
+            request = route.request
+            host = urlparse(request.url).hostname or ''
+            is_tracker = any(host == d or host.endswith('.' + d) for d in Config.BLOCKED_TRACKER_DOMAINS)
+            if request.resource_type in blocked_types or is_tracker:
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await page.route('**/*', handle)
+
+    async def _wait_until_ready(self, page, adapter_config: Optional[Dict]):
+        """Return once the adapter's content selectors match or its deadline passes"""
+        deadline_ms = (adapter_config or {}).get('wait_deadline', Config.DYNAMIC_WAIT_DEADLINE) * 1000
+        selectors, require_all = wait_conditions(adapter_config)
+
+        if not selectors:
+            try:
+                await page.wait_for_load_state('networkidle', timeout=deadline_ms)
+            except Exception:
+                pass
+            return
+
+        async def wait_for(selector):
+            try:
+                await page.wait_for_selector(selector, state='attached', timeout=deadline_ms)
+                return True
+            except Exception:
+                # Timed out, or a selector Playwright cannot parse
+                return False
+
+        waits = [asyncio.ensure_future(wait_for(selector)) for selector in selectors]
+        try:
+            if require_all:
+                await asyncio.gather(*waits)
+            else:
+                for finished in asyncio.as_completed(waits):
+                    if await finished:
+                        break
+        finally:
+            for wait in waits:
+                wait.cancel()
+
+    async def _acquire_slot(self) -> BrowserSlot:
+        """Return the least loaded healthy browser, launching replacements as needed"""
+        async with self.launch_lock:
+            if self.playwright is None:
+                # Imported here so static-only processes never load Playwright
+                from playwright.async_api import async_playwright
+                self.playwright = await async_playwright().start()
+
+            for slot in list(self.slots):
+                if not slot.browser.is_connected():
+                    logger.warning("Browser in pool crashed, replacing it")
+                    self.slots.remove(slot)
+
+            while len(self.slots) < self.size:
+                self.slots.append(await self._launch())
+
+        return min(self.slots, key=lambda slot: slot.active)
+
+    async def _launch(self) -> BrowserSlot:
+        before = self._child_pids()
+        browser = await self.playwright.chromium.launch(headless=True)
+        new_pids = self._child_pids() - before
+
+        # Keep only the root browser processes; renderers are found again on each RSS check
+        roots = set()
+        if psutil is not None:
+            for pid in new_pids:
+                try:
+                    if psutil.Process(pid).ppid() not in new_pids:
+                        roots.add(pid)
+                except psutil.Error:
+                    continue
+
+        context = await browser.new_context(user_agent=Config.DEFAULT_USER_AGENT)
+        return BrowserSlot(browser, context, roots)
+
+    def _child_pids(self) -> Set[int]:
+        if psutil is None:
+            return set()
+        return {child.pid for child in psutil.Process().children(recursive=True)}
+
+    async def _close_page(self, page, context, slot: BrowserSlot):
+        try:
+            if page is not None:
+                await page.close()
+            # Contexts replaced by recycling are closed once their last tab is done
+            if context is not slot.context and not context.pages:
+                await context.close()
+        except Exception as e:
+            logger.debug(f"Error closing page: {e}")
+
+    async def _maybe_recycle(self, slot: BrowserSlot):
+        if slot.retiring:
+            if slot.active == 0:
+                await self._close_browser(slot)
+            return
+
+        if self.max_rss_mb and slot.rss_mb() > self.max_rss_mb:
+            logger.info(f"Recycling browser above {self.max_rss_mb} MB RSS")
+            slot.retiring = True
+            if slot in self.slots:
+                self.slots.remove(slot)
+            if slot.active == 0:
+                await self._close_browser(slot)
+            return
+
+        if slot.navigations >= self.max_navigations and slot.browser.is_connected():
+            old_context = slot.context
+            slot.context = await slot.browser.new_context(user_agent=Config.DEFAULT_USER_AGENT)
+            slot.navigations = 0
+            if not old_context.pages:
+                await old_context.close()
+
+    async def _close_browser(self, slot: BrowserSlot):
+        try:
+            await slot.browser.close()
+        except Exception as e:
+            logger.debug(f"Error closing browser: {e}")
+
+    async def _shutdown(self):
+        for slot in self.slots:
+            await self._close_browser(slot)
+        self.slots = []
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,86 @@
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LEASE_LOST = 'lease_lost'  # cancel reason: another worker now runs the job and owns its document
+
+class JobCancelled(Exception):
+    """Raised when work is abandoned because its job was cancelled"""
+
+class CancellationToken:
+    """Thread-safe cancel flag shared by every stage working on one job"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    @property
+    def lease_lost(self) -> bool:
+        return self.reason == LEASE_LOST
+
+    def cancel(self, reason: str = 'cancelled'):
+        """Cancel the job and run the registered callbacks once; the first reason sticks"""
+        with self.lock:
+            if self.event.is_set():
+                return
+            self.reason = reason
+            self.event.set()
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in cancellation callback: {e}")
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run callback on cancellation (now, if already cancelled); returns a remover"""
+        with self.lock:
+            if not self.event.is_set():
+                self.callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback: Callable[[], None]):
+        with self.lock:
+            if callback in self.callbacks:
+                self.callbacks.remove(callback)
+
+    def raise_if_cancelled(self):
+        if self.event.is_set():
+            raise JobCancelled()
+
+_tokens: Dict[str, CancellationToken] = {}
+_tokens_lock = threading.Lock()
+
+def register_job(job_id: str) -> CancellationToken:
+    """Return the cancellation token for a job starting in this process"""
+    with _tokens_lock:
+        return _tokens.setdefault(job_id, CancellationToken())
+
+def unregister_job(job_id: str):
+    with _tokens_lock:
+        _tokens.pop(job_id, None)
+
+def cancel_job(job_id: str) -> bool:
+    """Cancel a job running in this process; False if it is not running here"""
+    with _tokens_lock:
+        token = _tokens.get(job_id)
+    if token is None:
+        return False
+    logger.info(f"Cancelling job {job_id}")
+    token.cancel()
+    return True
+
+def running_jobs() -> List[str]:
+    """Jobs currently running in this process"""
+    with _tokens_lock:
+        return list(_tokens)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the API process
+Fails (exit code 1) when a cold `import app` takes longer than the budget, so
+heavy dependencies (spaCy, Playwright, trafilatura, ...) stay lazily imported.
+
+Usage: python check_import_time.py [module] [--budget SECONDS]
+"""
+
+import os
+import re
+import sys
+import subprocess
+import argparse
+from pathlib import Path
+
+DEFAULT_BUDGET = float(os.environ.get('IMPORT_TIME_BUDGET', 1.5))  # seconds
+RUNS = 3
+
+TIMED_IMPORT = (
+    "import time; started = time.perf_counter(); import {module}; "
+    "print('IMPORT_SECONDS', time.perf_counter() - started)"
+)
+
+def time_import(module):
+    """Import a module in a fresh interpreter; return (seconds, -X importtime report)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', TIMED_IMPORT.format(module=module)],
+        cwd=Path(__file__).parent, capture_output=True, text=True
+    )
+    match = re.search(r'IMPORT_SECONDS ([\d.]+)', result.stdout)
+    if result.returncode != 0 or not match:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"Importing {module} failed")
+    return float(match.group(1)), result.stderr
+
+def slowest_imports(report, count=10):
+    """Top-level-inclusive import times from a -X importtime report, slowest first"""
+    rows = []
+    for line in report.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)', line)
+        if match and len(match.group(2)) <= 3:
+            rows.append((int(match.group(1)) / 1e6, match.group(3)))
+    return sorted(rows, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('module', nargs='?', default='app')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET)
+    args = parser.parse_args()
+
+    # Median of a few fresh interpreters smooths out disk-cache noise
+    timings = sorted(time_import(args.module) for _ in range(RUNS))
+    seconds, report = timings[len(timings) // 2]
+    print(f"import {args.module}: {seconds:.2f}s (budget {args.budget:.2f}s)")
+
+    if seconds > args.budget:
+        print("Slowest imports:")
+        for module_seconds, name in slowest_imports(report):
+            print(f"  {module_seconds:6.2f}s  {name}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
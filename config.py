@@ -12,6 +12,79 @@ class Config:
     MAX_RETRIES = 3
     RATE_LIMIT_DELAY = 1  # seconds between requests
     
+    # Batch Fetching
+    BATCH_FETCH_MODE = "async"  # "async" (concurrent) or "sync" (one URL at a time)
+    MAX_IN_FLIGHT_REQUESTS = 32  # global limit on concurrent requests per batch
+    
+    # Per-host Politeness (adapters override with a "politeness" block)
+    HOST_MIN_DELAY = RATE_LIMIT_DELAY  # seconds between request starts to one host
+    HOST_JITTER = 1  # random extra delay, in seconds
+    HOST_RATE = 1.0  # token bucket refill, requests per second
+    HOST_BURST = 2  # token bucket size
+    HOST_MAX_CONCURRENCY = 2  # simultaneous requests to one host
+    
+    # Browser Pool (dynamic scraping)
+    BROWSER_POOL_SIZE = 2  # long-lived browser processes
+    BROWSER_TABS_PER_BROWSER = 4  # concurrent pages per browser
+    BROWSER_MAX_NAVIGATIONS = 50  # recycle a browser context after this many pages
+    BROWSER_MAX_RSS_MB = 1024  # restart a browser whose process tree exceeds this
+    DYNAMIC_WAIT_DEADLINE = 10  # seconds to wait for adapter selectors (adapter "wait_deadline")
+    BLOCKED_RESOURCE_TYPES = ['image', 'font', 'media']  # adapter "block_resources" overrides
+    BLOCKED_TRACKER_DOMAINS = [
+        'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+        'googlesyndication.com', 'facebook.net', 'hotjar.com', 'segment.io',
+        'mixpanel.com', 'newrelic.com', 'nr-data.net', 'quantserve.com', 'scorecardresearch.com'
+    ]
+    
+    # Response Cache (adapters and jobs override with a "cache" block)
+    CACHE_ENABLED = True
+    CACHE_DIR = "cache"
+    CACHE_MAX_BYTES = 512 * 1024 * 1024  # LRU eviction above this size
+    CACHE_TTL = 3600  # seconds a cached response is served without revalidation
+    CACHE_STALE_WHILE_REVALIDATE = 0  # extra seconds a stale response may be served while refreshing
+    CACHE_VARY_HEADERS = ['Accept', 'Accept-Language']  # request headers that are part of the cache key
+    CACHE_REVALIDATE_WORKERS = 4  # threads refreshing stale entries in the background (sync fetches)
+    CACHE_MAX_REVALIDATIONS = 100  # stale entries refreshing at once; further stale hits are served without one
+    
+    # Extraction Pool (parse/extract off the fetch loop, in worker processes)
+    # Every process running jobs starts its own pool, so by default they split the CPUs (0 extracts in-process).
+    # JOB_WORKER_PROCESSES is set by `python worker.py`; unset, this process (e.g. the API with embedded workers) runs them all
+    EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS',
+                                            max(1, (os.cpu_count() or 1) // int(os.environ.get('JOB_WORKER_PROCESSES', 1)))))
+    EXTRACTION_QUEUE_SIZE = 64  # fetched pages waiting for a worker before fetching pauses
+    
+    # Staged Pipeline (fetch -> extract -> persist, joined by bounded queues)
+    PIPELINE_QUEUE_SIZE = 32  # items waiting between two stages before the earlier stage pauses
+    PIPELINE_EXTRACT_WORKERS = 16  # pages per job being extracted at once (feeds the extraction pool's batches)
+    
+    # Result Persistence
+    RESULT_BATCH_SIZE = 100  # results per insert_many
+    RESULT_MAX_PENDING = 1000  # buffered results before add() waits for the database to catch up
+    RESULT_FLUSH_INTERVAL = 2.0  # seconds a buffered result may wait before being written
+    PROGRESS_FLUSH_INTERVAL = 1.0  # seconds between job progress writes
+    PROGRESS_FLUSH_URLS = 50  # or sooner, after this many finished URLs
+    
+    # Global Limits (shared by every job in a process; see /api/admin/resources)
+    GLOBAL_MAX_IN_FLIGHT = 64  # HTTP requests in flight across all jobs
+    GLOBAL_MAX_RSS_MB = 4096  # no new requests start while the process tree is above this (0 disables)
+    GLOBAL_RSS_CHECK_INTERVAL = 1.0  # seconds between memory checks
+    
+    # Job Priorities (settable per job; weights split the global limits between running jobs)
+    JOB_PRIORITIES = {'low': 1, 'normal': 4, 'high': 16}  # fair-share weight per priority
+    DEFAULT_JOB_PRIORITY = 'normal'
+    
+    # Job Queue (jobs run in worker processes started with `python worker.py`)
+    JOB_QUEUE_BACKEND = os.environ.get('JOB_QUEUE_BACKEND', 'auto')  # "mongo", "sqlite", "private" (per-process temp file), or "auto" (mongo when connected, else private)
+    JOB_QUEUE_PATH = os.environ.get('JOB_QUEUE_PATH', 'job_queue.sqlite3')  # sqlite backend only
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))  # worker processes
+    JOB_CONCURRENCY = int(os.environ.get('JOB_CONCURRENCY', 4))  # jobs each worker runs at once, sharing its global limits
+    JOB_EMBEDDED_WORKERS = os.environ.get('JOB_EMBEDDED_WORKERS')  # worker threads in the API process; unset: only without MongoDB
+    JOB_LEASE_SECONDS = 60  # a job whose worker stops heartbeating is re-delivered after this
+    JOB_HEARTBEAT_INTERVAL = 5  # seconds between lease renewals
+    JOB_CANCEL_POLL_INTERVAL = 1.0  # seconds between checks for a cancel requested through the queue
+    JOB_POLL_INTERVAL = 1.0  # seconds an idle worker waits before asking for work again
+    JOB_MAX_ATTEMPTS = 3  # deliveries before a job is marked failed
+    
     # Proxy Configuration
     USE_PROXIES = False
     PROXY_LIST = []  # Add proxy URLs here if needed
@@ -19,6 +92,37 @@ class Config:
     # Contact Extraction
     EMAIL_REGEX = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
     PHONE_REGEX = r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
+    # Extraction tiers (per job "extraction_tier", or adapter "extraction_tier"):
+    #   fast     - regex, structured markup and name heuristics, never NER
+    #   standard - adds NER on pages that pass NER_GATE
+    #   full     - NER on every page
+    # Throughput per tier: python benchmark_extraction.py (figures in README)
+    EXTRACTION_TIERS = ['fast', 'standard', 'full']
+    EXTRACTION_TIER = 'standard'
+    NER_MODEL = "en_core_web_sm"
+    NER_EXCLUDED_PIPES = ['tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter']  # only ner (and its tok2vec) is used
+    NER_MAX_CHARS = 100000  # NER sees at most this much of a page's (whitespace-collapsed) text
+    NER_BATCH_SIZE = 16  # pages per extraction batch and nlp.pipe batch_size
+    NER_BATCH_DEADLINE = 0.05  # seconds a page may wait for its batch to fill while all workers are busy
+    NER_N_PROCESS = 1  # nlp.pipe n_process; mainly useful with EXTRACTION_WORKERS = 0
+    # Per-task-type gate deciding whether a page is worth an NER pass. NER runs when
+    # the page has at least min_text_chars of text and either min_signals regex hits
+    # of the listed kinds or, with contact_sections, a matched contact-section element.
+    # Task types without an entry always run NER.
+    NER_GATE = {
+        'lead': {
+            'min_text_chars': 200,
+            'signals': ['email', 'phone', 'linkedin', 'twitter'],
+            'min_signals': 1,
+            'contact_sections': True
+        },
+        'job': {
+            'min_text_chars': 200,
+            'signals': ['email', 'phone', 'linkedin', 'twitter', 'salary', 'location'],
+            'min_signals': 1,
+            'contact_sections': True
+        }
+    }
     
     # File paths
     ADAPTERS_DIR = "adapters"
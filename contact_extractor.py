@@ -1,96 +1,224 @@
 import re
+import json
 import logging
-from typing import List, Dict, Set
-import spacy
-from lxml import html
+from typing import List, Dict, Optional, Set, Union
+from config import Config
+from parsed_page import ParsedPage, as_page
+from contact_scanner import ContactScan
 
 logger = logging.getLogger(__name__)
 
+# Fast-tier heuristics
+PERSON_TYPES = {'Person'}
+ORGANIZATION_TYPES = {'Organization', 'Corporation', 'LocalBusiness', 'NGO', 'EducationalOrganization',
+                      'GovernmentOrganization', 'NewsMediaOrganization'}
+NAME_PATTERN = re.compile(r"\b[A-Z][a-z]+(?:\s+[A-Z]\.)?\s+[A-Z][a-z]+(?:[-'][A-Z][a-z]+)?\b")
+EMAIL_NAME_LOCAL_PART = re.compile(r'^([a-z]{2,})[._]([a-z]{2,})@')
+NAME_WINDOW = 80  # characters before an email searched for the owner's name
+NON_NAME_WORDS = {'Contact', 'Email', 'Mail', 'Phone', 'Call', 'Us', 'About', 'Our', 'Team', 'Sales',
+                  'Support', 'Info', 'Office', 'Home', 'Main', 'Head', 'Customer', 'Service', 'Press',
+                  'Media', 'General', 'Inquiries', 'Careers', 'Send', 'Write', 'Reach', 'Visit'}
+
 class ContactExtractor:
     def __init__(self):
-        self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
-        self.phone_pattern = re.compile(r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
-        self.linkedin_pattern = re.compile(r'linkedin\.com/in/([a-zA-Z0-9-]+)')
-        self.twitter_pattern = re.compile(r'twitter\.com/([a-zA-Z0-9_]+)')
-        
-        # Try to load spaCy model
+        # Try to load spaCy model (imported here: importing spaCy alone costs seconds)
+        # Only the NER component is used; the other pipes are never loaded
         try:
-            self.nlp = spacy.load("en_core_web_sm")
+            import spacy
+            self.nlp = spacy.load(Config.NER_MODEL, exclude=Config.NER_EXCLUDED_PIPES)
         except OSError:
             logger.warning("spaCy model not found. Install with: python -m spacy download en_core_web_sm")
             self.nlp = None
     
     def extract_emails(self, text: str) -> Set[str]:
         """Extract email addresses from text"""
-        emails = set()
-        matches = self.email_pattern.findall(text)
-        for match in matches:
-            email = match.lower().strip()
-            # Filter out common false positives
-            if not any(exclude in email for exclude in ['@example.', '@test.', '@placeholder.']):
-                emails.add(email)
-        return emails
+        return set(ContactScan(text).values('email'))
     
     def extract_phones(self, text: str) -> Set[str]:
         """Extract phone numbers from text"""
-        phones = set()
-        matches = self.phone_pattern.findall(text)
-        for match in matches:
-            phone = re.sub(r'[^\d+]', '', match)
-            if len(phone) >= 10:  # Minimum valid phone length
-                phones.add(match.strip())
-        return phones
+        return set(ContactScan(text).values('phone'))
     
     def extract_social_links(self, text: str) -> Dict[str, Set[str]]:
         """Extract social media links"""
-        social_links = {
-            'linkedin': set(),
-            'twitter': set()
+        return self._social_links(ContactScan(text))
+    
+    def _social_links(self, scan: ContactScan) -> Dict[str, Set[str]]:
+        return {
+            'linkedin': set(scan.values('linkedin')),
+            'twitter': set(scan.values('twitter'))
         }
+    
+    def _section_first(self, page: ParsedPage, kind: str) -> List[str]:
+        """Unique matches of one kind, those inside contact sections first"""
+        in_sections = page.contact_scan.values(kind, page.contact_section_spans)
+        return list(dict.fromkeys(in_sections + page.contact_scan.values(kind)))
+    
+    def ner_window(self, text: str) -> str:
+        """Whitespace-collapsed text, capped at NER_MAX_CHARS so huge pages stay bounded"""
+        return ' '.join(text.split())[:Config.NER_MAX_CHARS]
+    
+    def entities_from_doc(self, doc) -> Dict[str, Set[str]]:
+        """Person names and companies from an NER-processed spaCy doc"""
+        entities = {'names': set(), 'companies': set()}
+        for ent in doc.ents:
+            if ent.label_ == "PERSON":
+                name = ent.text.strip()
+                # Filter out single words and common false positives
+                if len(name.split()) >= 2 and len(name) > 3:
+                    entities['names'].add(name)
+            elif ent.label_ in ["ORG", "GPE"]:  # Organizations and geopolitical entities
+                company = ent.text.strip()
+                if len(company) > 2:
+                    entities['companies'].add(company)
+        return entities
+    
+    def extract_entities(self, text: str) -> Dict[str, Set[str]]:
+        """Run spaCy NER once and return both person names and companies"""
+        if not self.nlp:
+            return {'names': set(), 'companies': set()}
+        
+        try:
+            return self.entities_from_doc(self.nlp(self.ner_window(text)))
+        except Exception as e:
+            logger.error(f"Error in spaCy entity extraction: {e}")
+            return {'names': set(), 'companies': set()}
+    
+    def page_entities(self, page: ParsedPage) -> Dict[str, Set[str]]:
+        """Entities of a page, computed at most once per page"""
+        if page.entities is None:
+            page.entities = self.extract_entities(page.text_content)
+        return page.entities
+    
+    def resolve_tier(self, tier: Optional[str]) -> str:
+        if tier is None:
+            return Config.EXTRACTION_TIER
+        if tier not in Config.EXTRACTION_TIERS:
+            logger.warning(f"Unknown extraction tier '{tier}', using '{Config.EXTRACTION_TIER}'")
+            return Config.EXTRACTION_TIER
+        return tier
+    
+    def gate_ner(self, page: ParsedPage, task_type: str, tier: Optional[str] = None) -> bool:
+        """Decide from the tier and cheap signals whether a page still needs an NER pass.
+
+        Pages that skip NER get their entities now (heuristic ones in the fast
+        tier, none otherwise), so no later stage runs NER on them.
+        """
+        if page.entities is not None:
+            return False
+        tier = self.resolve_tier(tier)
+        if tier == 'fast':
+            page.entities = self.heuristic_entities(page)
+            return False
+        policy = Config.NER_GATE.get(task_type)
+        if tier == 'full' or not policy:
+            return True
         
-        # LinkedIn profiles
-        linkedin_matches = self.linkedin_pattern.findall(text)
-        for match in linkedin_matches:
-            social_links['linkedin'].add(f"linkedin.com/in/{match}")
+        run_ner = len(page.text_content) >= policy.get('min_text_chars', 0)
+        if run_ner:
+            hits = page.contact_scan.count()
+            signals = sum(hits.get(kind, 0) for kind in policy.get('signals', []))
+            run_ner = (signals >= policy.get('min_signals', 1)
+                       or (policy.get('contact_sections', False) and bool(page.contact_section_spans)))
         
-        # Twitter profiles
-        twitter_matches = self.twitter_pattern.findall(text)
-        for match in twitter_matches:
-            social_links['twitter'].add(f"twitter.com/{match}")
+        if not run_ner:
+            logger.debug(f"Skipping NER for {page.url}: no contact evidence")
+            page.entities = {'names': set(), 'companies': set()}
+        return run_ner
+    
+    def heuristic_entities(self, page: ParsedPage) -> Dict[str, Set[str]]:
+        """Names and companies without NER: structured markup plus names found next to emails"""
+        entities = self.structured_entities(page)
         
-        return social_links
+        text = page.text_content
+        for match in page.contact_scan.matches:
+            if match.kind != 'email':
+                continue
+            # The closest name-like phrase just before the address, e.g. "Jane Doe: jane@..."
+            candidates = [name for name in NAME_PATTERN.findall(text, max(0, match.start - NAME_WINDOW), match.start)
+                          if not NON_NAME_WORDS.intersection(name.split())]
+            if candidates:
+                entities['names'].add(candidates[-1])
+                continue
+            # Otherwise a first.last@ mailbox
+            local_part = EMAIL_NAME_LOCAL_PART.match(match.value)
+            if local_part:
+                entities['names'].add(f"{local_part.group(1).title()} {local_part.group(2).title()}")
+        return entities
     
-    def extract_names_with_spacy(self, text: str) -> Set[str]:
-        """Extract person names using spaCy NER"""
-        if not self.nlp:
-            return set()
+    def structured_entities(self, page: ParsedPage) -> Dict[str, Set[str]]:
+        """Person and organization names from JSON-LD, schema.org microdata and og:site_name"""
+        entities = {'names': set(), 'companies': set()}
+        
+        def visit(node):
+            if isinstance(node, list):
+                for item in node:
+                    visit(item)
+            elif isinstance(node, dict):
+                types = node.get('@type', [])
+                types = set(types if isinstance(types, list) else [types])
+                name = node.get('name')
+                if isinstance(name, str) and name.strip():
+                    if types & PERSON_TYPES:
+                        entities['names'].add(name.strip())
+                    elif types & ORGANIZATION_TYPES:
+                        entities['companies'].add(name.strip())
+                for value in node.values():
+                    if isinstance(value, (list, dict)):
+                        visit(value)
+        
+        for script in page.select('//script[@type="application/ld+json"]'):
+            try:
+                visit(json.loads(script.text_content()))
+            except ValueError:
+                continue
+        
+        for item in page.select('//*[@itemscope][@itemtype]'):
+            item_type = item.get('itemtype', '').rstrip('/').rsplit('/', 1)[-1]
+            names = item.xpath('.//*[@itemprop="name"]')
+            name = names[0].text_content().strip() if names else ''
+            if not name:
+                continue
+            if item_type in PERSON_TYPES:
+                entities['names'].add(name)
+            elif item_type in ORGANIZATION_TYPES:
+                entities['companies'].add(name)
+        
+        for meta in page.select('//meta[@property="og:site_name"]'):
+            if meta.get('content', '').strip():
+                entities['companies'].add(meta.get('content').strip())
+        
+        return entities
+    
+    def annotate_pages(self, pages: List[ParsedPage]):
+        """Fill in entities for many pages with one batched nlp.pipe run"""
+        pending = [page for page in pages if page.entities is None]
+        if not self.nlp or not pending:
+            return
         
-        names = set()
         try:
-            doc = self.nlp(text)
-            for ent in doc.ents:
-                if ent.label_ == "PERSON":
-                    name = ent.text.strip()
-                    # Filter out single words and common false positives
-                    if len(name.split()) >= 2 and len(name) > 3:
-                        names.add(name)
+            docs = self.nlp.pipe((self.ner_window(page.text_content) for page in pending),
+                                 batch_size=Config.NER_BATCH_SIZE, n_process=Config.NER_N_PROCESS)
+            for page, doc in zip(pending, docs):
+                page.entities = self.entities_from_doc(doc)
         except Exception as e:
-            logger.error(f"Error in spaCy name extraction: {e}")
-        
-        return names
+            # Pages left without entities fall back to per-page NER
+            logger.error(f"Error in batched spaCy entity extraction: {e}")
     
-    def extract_contacts(self, html_content: str, url: str = "") -> List[Dict]:
-        """Extract all contact information from HTML content"""
+    def extract_names_with_spacy(self, text: str) -> Set[str]:
+        """Extract person names using spaCy NER"""
+        return self.extract_entities(text)['names']
+    
+    def extract_contacts(self, html_content: Union[str, ParsedPage], url: str = "") -> List[Dict]:
+        """Extract all contact information from HTML content or an already parsed page"""
         try:
-            # Parse HTML
-            tree = html.fromstring(html_content)
-            text_content = tree.text_content()
+            page = as_page(html_content, url)
+            url = url or page.url
             
-            # Extract various contact details
-            emails = self.extract_emails(text_content)
-            phones = self.extract_phones(text_content)
-            social_links = self.extract_social_links(text_content)
-            names = self.extract_names_with_spacy(text_content)
+            # Extract various contact details from the page's single token scan
+            emails = page.contact_scan.values('email')
+            phones = page.contact_scan.values('phone')
+            social_links = self._social_links(page.contact_scan)
+            names = self.page_entities(page)['names']
             
             # Create contact records
             contacts = []
@@ -123,65 +251,25 @@ class ContactExtractor:
             logger.error(f"Error extracting contacts: {e}")
             return []
         
-        return names
-    
     def extract_companies_with_spacy(self, text: str) -> Set[str]:
         """Extract company/organization names using spaCy NER"""
-        if not self.nlp:
-            return set()
-        
-        companies = set()
-        try:
-            doc = self.nlp(text)
-            for ent in doc.ents:
-                if ent.label_ in ["ORG", "GPE"]:  # Organizations and geopolitical entities
-                    company = ent.text.strip()
-                    if len(company) > 2:
-                        companies.add(company)
-        except Exception as e:
-            logger.error(f"Error in company extraction: {e}")
-        
-        return companies
+        return self.extract_entities(text)['companies']
     
-    def extract_from_html(self, html_content: str) -> Dict:
-        """Extract contacts from HTML content"""
+    def extract_from_html(self, html_content: Union[str, ParsedPage]) -> Dict:
+        """Extract contacts from HTML content or an already parsed page"""
         try:
-            # Parse HTML
-            tree = html.fromstring(html_content)
-            text_content = tree.text_content()
+            page = as_page(html_content)
+            entities = self.page_entities(page)
             
-            # Extract all contact information
+            # Extract all contact information; section matches come from scan offsets
             contacts = {
-                'emails': list(self.extract_emails(text_content)),
-                'phones': list(self.extract_phones(text_content)),
-                'social_links': {k: list(v) for k, v in self.extract_social_links(text_content).items()},
-                'names': list(self.extract_names_with_spacy(text_content)),
-                'companies': list(self.extract_companies_with_spacy(text_content))
+                'emails': self._section_first(page, 'email'),
+                'phones': self._section_first(page, 'phone'),
+                'social_links': {k: list(v) for k, v in self._social_links(page.contact_scan).items()},
+                'names': list(entities['names']),
+                'companies': list(entities['companies'])
             }
             
-            # Extract specific contact sections
-            contact_selectors = [
-                '.contact', '.contact-info', '.contact-us',
-                '.team', '.about-us', '.staff',
-                'footer', '.footer'
-            ]
-            
-            for selector in contact_selectors:
-                elements = tree.cssselect(selector)
-                for element in elements:
-                    section_text = element.text_content()
-                    
-                    # Extract from contact sections
-                    section_emails = self.extract_emails(section_text)
-                    section_phones = self.extract_phones(section_text)
-                    
-                    contacts['emails'].extend(list(section_emails))
-                    contacts['phones'].extend(list(section_phones))
-            
-            # Remove duplicates
-            contacts['emails'] = list(set(contacts['emails']))
-            contacts['phones'] = list(set(contacts['phones']))
-            
             return contacts
             
         except Exception as e:
@@ -194,21 +282,17 @@ class ContactExtractor:
                 'companies': []
             }
     
-    def extract_job_details(self, html_content: str) -> Dict:
-        """Extract job-specific information"""
+    def extract_job_details(self, html_content: Union[str, ParsedPage]) -> Dict:
+        """Extract job-specific information from HTML content or an already parsed page"""
         try:
-            tree = html.fromstring(html_content)
-            text_content = tree.text_content()
-            
-            # Job-specific patterns
-            salary_pattern = re.compile(r'\$[\d,]+(?:\.\d{2})?(?:\s*-\s*\$[\d,]+(?:\.\d{2})?)?(?:\s*(?:per|\/)\s*(?:hour|year|month))?', re.IGNORECASE)
-            location_pattern = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*,\s*[A-Z]{2}\b')
+            page = as_page(html_content)
             
+            # Salaries and locations come from the same token scan as the contacts
             job_details = {
-                'salary_ranges': list(set(salary_pattern.findall(text_content))),
-                'locations': list(set(location_pattern.findall(text_content))),
-                'companies': list(self.extract_companies_with_spacy(text_content)),
-                'contacts': self.extract_from_html(html_content)
+                'salary_ranges': page.contact_scan.values('salary'),
+                'locations': page.contact_scan.values('location'),
+                'companies': list(self.page_entities(page)['companies']),
+                'contacts': self.extract_from_html(page)
             }
             
             return job_details
@@ -222,6 +306,19 @@ class ContactExtractor:
                 'contacts': {'emails': [], 'phones': [], 'social_links': {'linkedin': [], 'twitter': []}, 'names': [], 'companies': []}
             }
     
+    def enrich_scraped_data(self, page: ParsedPage, scraped_data: Dict, task_type: str,
+                            tier: Optional[str] = None) -> Dict:
+        """Add lead contacts or job details extracted from an already fetched page"""
+        self.gate_ner(page, task_type, tier)
+        if task_type == 'lead':
+            contacts = self.extract_from_html(page)
+            scraped_data['contacts'] = contacts
+            scraped_data['lead_score'] = self.score_lead_quality(contacts)
+        elif task_type == 'job':
+            job_details = self.extract_job_details(page)
+            scraped_data.update(job_details)
+        return scraped_data
+    
     def score_lead_quality(self, contact_data: Dict) -> int:
         """Score lead quality based on available contact information"""
         score = 0
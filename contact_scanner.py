@@ -0,0 +1,90 @@
+import re
+from bisect import bisect_right
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# One alternation per token type, scanned left to right in a single pass. At a
+# given offset the first alternative wins, so emails come before social links and
+# salaries before bare phone numbers. Each alternative ends with an empty named
+# group that tags the match with its kind. The phone pattern is the original one
+# with its optional prefix unrolled so that every branch starts with a concrete
+# character; the location pattern uses possessive quantifiers. Both match the
+# same strings as before but reject non-candidate offsets much sooner.
+TOKEN_PATTERNS = [
+    ('email', r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+    ('linkedin', r'linkedin\.com/in/[a-zA-Z0-9-]+'),
+    ('twitter', r'twitter\.com/[a-zA-Z0-9_]+'),
+    ('salary', r'\$(?i:[\d,]+(?:\.\d{2})?(?:\s*-\s*\$[\d,]+(?:\.\d{2})?)?(?:\s*(?:per|\/)\s*(?:hour|year|month))?)'),
+    ('phone', r'(?:\+\d{1,3}[-.\s]?\(?\d{3}|\d{1,3}[-.\s]?\(?\d{3}|\(\d{3}|\d{3})\)?[-.\s]?\d{3}[-.\s]?\d{4}'),
+    ('location', r'\b[A-Z][a-z]++(?:\s+[A-Z][a-z]++)*+,\s*[A-Z]{2}\b'),
+]
+SCANNER_PATTERN = re.compile('|'.join(f'{pattern}(?P<{kind}>)' for kind, pattern in TOKEN_PATTERNS))
+
+EXCLUDED_EMAIL_DOMAINS = ['@example.', '@test.', '@placeholder.']
+MIN_PHONE_DIGITS = 10
+
+ScanMatch = namedtuple('ScanMatch', ['kind', 'value', 'start', 'end'])
+
+NON_PHONE_CHARS = re.compile(r'[^\d+]')
+
+def _normalize(kind: str, value: str) -> Optional[str]:
+    """Clean a raw email or phone match; None drops it"""
+    if kind == 'email':
+        value = value.lower().strip()
+        if any(exclude in value for exclude in EXCLUDED_EMAIL_DOMAINS):
+            return None
+    elif len(NON_PHONE_CHARS.sub('', value)) < MIN_PHONE_DIGITS:
+        return None
+    return value.strip()
+
+class ContactScan:
+    """Typed, offset-tagged contact and job-detail tokens found in one pass over a text"""
+
+    def __init__(self, text: str):
+        self.matches: List[ScanMatch] = []
+        append = self.matches.append
+        for match in SCANNER_PATTERN.finditer(text):
+            kind = match.lastgroup
+            value = match.group()
+            if kind == 'email' or kind == 'phone':
+                value = _normalize(kind, value)
+                if not value:
+                    continue
+            append(ScanMatch(kind, value, *match.span()))
+
+    def values(self, kind: str, spans: Optional[Sequence[Tuple[int, int]]] = None) -> List[str]:
+        """Unique values of one kind in document order, optionally only those inside spans"""
+        inside = _span_test(spans)
+        seen = {}
+        for match in self.matches:
+            if match.kind == kind and inside(match):
+                seen.setdefault(match.value, None)
+        return list(seen)
+
+    def count(self, spans: Optional[Sequence[Tuple[int, int]]] = None) -> Dict[str, int]:
+        """Number of matches per kind, optionally only those inside spans"""
+        inside = _span_test(spans)
+        counts = {}
+        for match in self.matches:
+            if inside(match):
+                counts[match.kind] = counts.get(match.kind, 0) + 1
+        return counts
+
+def _span_test(spans: Optional[Sequence[Tuple[int, int]]]):
+    """Predicate telling whether a match lies inside the union of spans"""
+    if spans is None:
+        return lambda match: True
+
+    # Merge nested and overlapping spans, then binary-search the disjoint result
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    starts = [start for start, _ in merged]
+
+    def inside(match: ScanMatch) -> bool:
+        i = bisect_right(starts, match.start) - 1
+        return i >= 0 and match.end <= merged[i][1]
+    return inside
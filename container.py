@@ -0,0 +1,114 @@
+import threading
+import logging
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class ServiceContainer:
+    """Process-wide scraping components, built once and shared by requests and worker threads"""
+
+    def __init__(self, db=None):
+        self.db = db
+        self._services: Dict[str, object] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._started = False
+
+    def _get(self, name: str, factory: Callable):
+        service = self._services.get(name)
+        if service is not None:
+            return service
+
+        # One lock per service: concurrent first requests build it once, and building
+        # one service never blocks requests that only need another
+        with self._locks_lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            service = self._services.get(name)
+            if service is None:
+                logger.info(f"Initializing {name}")
+                service = factory()
+                self._services[name] = service
+        return service
+
+    @property
+    def scraper_engine(self):
+        from scraper_engine import ScraperEngine
+        return self._get('scraper_engine', ScraperEngine)
+
+    @property
+    def contact_extractor(self):
+        from contact_extractor import ContactExtractor
+        return self._get('contact_extractor', ContactExtractor)
+
+    @property
+    def adapter_manager(self):
+        from adapters import AdapterManager
+        return self._get('adapter_manager', AdapterManager)
+
+    @property
+    def batch_scraper(self):
+        from scraper_engine import BatchScraper
+        return self._get('batch_scraper', lambda: BatchScraper(
+            self.scraper_engine, contact_extractor=self.contact_extractor))
+
+    @property
+    def job_queue(self):
+        from job_queue import get_job_queue
+        return self._get('job_queue', lambda: get_job_queue(self.db))
+
+    @property
+    def task_manager(self):
+        from tasks import TaskManager
+        return self._get('task_manager', lambda: TaskManager(
+            self.db,
+            scraper_engine=self.scraper_engine,
+            contact_extractor=self.contact_extractor,
+            batch_scraper=self.batch_scraper,
+            adapter_manager=self.adapter_manager,
+            job_queue=self.job_queue
+        ))
+
+    @property
+    def real_time_scraper(self):
+        from real_time_scraper import RealTimeScraper
+        return self._get('real_time_scraper', lambda: RealTimeScraper(
+            self.db,
+            scraper_engine=self.scraper_engine,
+            batch_scraper=self.batch_scraper,
+            contact_extractor=self.contact_extractor,
+            job_queue=self.job_queue
+        ))
+
+    def warm(self):
+        """Build every service now instead of on the first request"""
+        try:
+            self.task_manager
+            self.real_time_scraper
+            logger.info("Service container warmed")
+        except Exception as e:
+            logger.error(f"Service warm-up failed: {e}")
+
+    def start(self):
+        """Warm services and start embedded job workers; later calls do nothing.
+
+        Called from the serving process (a before_request hook), never at import
+        time: spawned extraction workers re-import the app module as __mp_main__.
+        """
+        if self._started:
+            return
+        with self._locks_lock:
+            if self._started:
+                return
+            self._started = True
+        self.warm_in_background()
+
+        # Jobs run in `python worker.py` processes; without MongoDB they run on threads here
+        from worker import start_embedded_workers
+        start_embedded_workers(self)
+
+    def warm_in_background(self) -> threading.Thread:
+        """Warm services without delaying app startup; early requests wait on the service they need"""
+        thread = threading.Thread(target=self.warm, name='service-warmup', daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,251 @@
+import time
+import atexit
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from parsed_page import ParsedPage
+from governor import SharedLimit, get_governor
+
+logger = logging.getLogger(__name__)
+
+# Per-worker state, built once by the pool initializer
+_worker_batch_scraper = None
+
+def _init_worker():
+    """Load spaCy and compile the adapter plans once per worker process"""
+    global _worker_batch_scraper
+    from scraper_engine import ScraperEngine, BatchScraper
+    from contact_extractor import ContactExtractor
+    from selector_plan import compile_adapter
+
+    _worker_batch_scraper = BatchScraper(ScraperEngine(), contact_extractor=ContactExtractor(),
+                                         extraction_pool=False)
+    for adapter_config in Config.load_adapters().values():
+        compile_adapter(adapter_config)
+
+def _resolve(future: Future, result=None, error: Optional[BaseException] = None):
+    """Settle one page's future; a job may cancel it from another thread at any moment"""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass  # cancelled meanwhile; the other pages of the batch still need their results
+
+def extract_batch(batch_scraper, items: List[Tuple[str, ParsedPage, Dict, str]]) -> List[Dict]:
+    """Run NER for a whole batch in one nlp.pipe call, then extract each page"""
+    from selector_plan import compile_adapter
+
+    extractor = batch_scraper.contact_extractor
+    if extractor:
+        extractor.annotate_pages([page for _, page, adapter_config, task_type in items
+                                  if task_type in ['lead', 'job']
+                                  and extractor.gate_ner(page, task_type, adapter_config.get('extraction_tier'))])
+
+    results = []
+    for url, page, adapter_config, task_type in items:
+        try:
+            results.append(batch_scraper.extract_page(url, page, adapter_config, task_type,
+                                                      compile_adapter(adapter_config)))
+        except Exception as e:
+            logger.error(f"Error extracting {url}: {e}")
+            results.append({'url': url, 'error': str(e)})
+    return results
+
+def extract_batch_in_worker(payloads: List[Tuple]) -> List[Dict]:
+    """Rebuild pages from raw bytes inside a worker process and extract them"""
+    items = [(url, ParsedPage(url, text=text, raw=raw, encoding=encoding), adapter_config, task_type)
+             for url, raw, text, encoding, adapter_config, task_type in payloads]
+    return extract_batch(_worker_batch_scraper, items)
+
+class ExtractionPool:
+    """Parse/extract stage fed through a bounded queue.
+
+    Pages are grouped into batches so each batch's NER runs as one nlp.pipe
+    call. A batch is dispatched as soon as a worker is idle, when it reaches
+    NER_BATCH_SIZE pages, or when its oldest page has waited NER_BATCH_DEADLINE
+    seconds. Batches run in worker processes, or on one in-process thread when
+    EXTRACTION_WORKERS is 0.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 batch_size: Optional[int] = None, batch_deadline: Optional[float] = None):
+        self.workers = Config.EXTRACTION_WORKERS if workers is None else workers
+        self.queue_size = queue_size or Config.EXTRACTION_QUEUE_SIZE
+        self.batch_size = batch_size or Config.NER_BATCH_SIZE
+        self.batch_deadline = Config.NER_BATCH_DEADLINE if batch_deadline is None else batch_deadline
+        # Queued pages count against the process-wide governor unless sized explicitly
+        if queue_size is None:
+            self.slots = get_governor().limit('extraction')
+        else:
+            self.slots = SharedLimit('extraction', self.queue_size)
+        self.executor = None
+        self.lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.pending = []  # (queued_at, item, future, batch_scraper)
+        self.batches_in_flight = 0
+        self.flusher = None
+        self.closed = False
+
+    @property
+    def in_process(self) -> bool:
+        return self.workers <= 0
+
+    def _get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                if self.in_process:
+                    self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='extraction')
+                else:
+                    # spawn, not fork: the parent process runs Flask and fetch threads
+                    self.executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker
+                    )
+            return self.executor
+
+    def submit(self, url: str, page: ParsedPage, adapter_config: Dict, task_type: str = 'general',
+               batch_scraper=None, cancel_token=None) -> Future:
+        """Queue a page for extraction; blocks while the queue is full.
+
+        batch_scraper does the extraction when running in-process; worker
+        processes use their own. A cancelled cancel_token stops the wait for
+        a queue slot with JobCancelled.
+        """
+        if self.in_process:
+            item = (url, page, adapter_config, task_type)
+        else:
+            # Ship the raw bytes when we have them, text only for rendered pages
+            text = None if page.raw is not None else page.text
+            item = (url, page.raw, text, page.encoding, adapter_config, task_type)
+
+        while not self.slots.acquire(timeout=0.1):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+        if cancel_token is not None and cancel_token.cancelled:
+            self.slots.release()
+            cancel_token.raise_if_cancelled()
+        future = Future()
+        future.add_done_callback(lambda _: self.slots.release())
+        with self.condition:
+            self.pending.append((time.monotonic(), item, future, batch_scraper))
+            if self.flusher is None:
+                self.closed = False
+                self.flusher = threading.Thread(target=self._flush_loop, name='extraction-batcher', daemon=True)
+                self.flusher.start()
+            self.condition.notify()
+        return future
+
+    def _flush_loop(self):
+        capacity = 1 if self.in_process else self.workers
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    self.flusher = None
+                    return
+
+                # Idle workers get pages right away; busy ones get fuller batches
+                deadline = self.pending[0][0] + self.batch_deadline
+                while (len(self.pending) < self.batch_size and self.batches_in_flight >= capacity
+                       and not self.closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+                batch = self.pending[:self.batch_size]
+                del self.pending[:self.batch_size]
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Tuple]):
+        # Futures cancelled while queued belong to cancelled jobs; never extract them
+        batch = [entry for entry in batch if not entry[2].cancelled()]
+        if not batch:
+            return
+        if not self.in_process:
+            self._submit(extract_batch_in_worker, None, batch)
+            return
+        # In-process batches run on the submitting BatchScraper's own extractors
+        groups = {}
+        for entry in batch:
+            groups.setdefault(id(entry[3]), []).append(entry)
+        for group in groups.values():
+            self._submit(extract_batch, group[0][3], group)
+
+    def _submit(self, function, batch_scraper, batch: List[Tuple]):
+        futures = [future for _, _, future, _ in batch]
+        items = [item for _, item, _, _ in batch]
+        with self.condition:
+            self.batches_in_flight += 1
+        try:
+            args = (items,) if batch_scraper is None else (batch_scraper, items)
+            done = self._get_executor().submit(function, *args)
+        except Exception as e:
+            self._batch_finished()
+            for future in futures:
+                _resolve(future, error=e)
+            return
+
+        def cancel_if_abandoned(_):
+            # Every page in the batch belongs to a cancelled job: drop the batch if it has not started
+            if all(future.cancelled() for future in futures):
+                done.cancel()
+        for future in futures:
+            future.add_done_callback(cancel_if_abandoned)
+
+        def distribute(done_future: Future):
+            self._batch_finished()
+            error = RuntimeError("Extraction batch was cancelled") if done_future.cancelled() else done_future.exception()
+            results = done_future.result() if error is None else [None] * len(futures)
+            for future, result in zip(futures, results):
+                _resolve(future, result, error)
+        done.add_done_callback(distribute)
+
+    def _batch_finished(self):
+        with self.condition:
+            self.batches_in_flight -= 1
+            self.condition.notify()
+
+    def stats(self) -> Dict:
+        """Snapshot of pool utilisation"""
+        with self.condition:
+            return {
+                'workers': self.workers,
+                'pending_pages': len(self.pending),
+                'batches_in_flight': self.batches_in_flight
+            }
+
+    def reset(self):
+        """Discard a broken executor; the next batch starts fresh workers"""
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+    def shutdown(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True, cancel_futures=True)
+                self.executor = None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_extraction_pool() -> ExtractionPool:
+    """Return the process-wide extraction pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool()
+            atexit.register(_pool.shutdown)
+        return _pool
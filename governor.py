@@ -0,0 +1,268 @@
+import time
+import heapq
+import asyncio
+import contextvars
+import logging
+import threading
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+from config import Config
+
+try:
+    import psutil
+except ImportError:
+    # Memory limits are not enforced without psutil
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+class Share:
+    """One job's claim on the global limits; its weight comes from the job's priority"""
+
+    def __init__(self, key: Optional[str] = None, priority: Optional[str] = None):
+        self.key = key
+        self.priority = priority or Config.DEFAULT_JOB_PRIORITY
+        self.weight = Config.JOB_PRIORITIES.get(self.priority, Config.JOB_PRIORITIES[Config.DEFAULT_JOB_PRIORITY])
+
+# Work outside any job (searches, ad-hoc API calls) shares one default slot
+_default_share = Share()
+_current_share = contextvars.ContextVar('governor_share', default=_default_share)
+
+def current_share() -> Share:
+    """The share the calling thread or task acquires slots for"""
+    return _current_share.get()
+
+@contextmanager
+def job_share(job_id: str, priority: Optional[str] = None):
+    """Acquire slots for job_id at the job's priority inside this block (and tasks it starts)"""
+    token = _current_share.set(Share(job_id, priority))
+    try:
+        yield
+    finally:
+        _current_share.reset(token)
+
+class _Waiter:
+    __slots__ = ('key', 'tag', 'previous_tag', 'event', 'loop', 'future', 'granted', 'removed')
+
+    def __init__(self, key, event=None, loop=None, future=None):
+        self.key = key
+        self.event = event
+        self.loop = loop
+        self.future = future
+        self.granted = False
+        self.removed = False
+
+class SharedLimit:
+    """Counting semaphore shared by threads and by any number of event loops.
+
+    Waiters are served by start-time fair queueing over shares: every job
+    gets slots in proportion to its priority weight however many requests it
+    has queued, so a 50k-URL job cannot starve a five-URL one, and a
+    high-priority job's requests move ahead of queued ones. Slots already
+    held are never taken back.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.in_use = 0
+        self.acquired = 0
+        self.lock = threading.Lock()
+        self.heap = []  # (finish tag, sequence, _Waiter)
+        self.sequence = 0
+        self.waiting = 0
+        self.virtual_time = 0.0
+        self.last_tags = {}  # share key -> finish tag of its newest queued waiter
+
+    def _enqueue(self, share: Share, waiter: _Waiter):
+        waiter.previous_tag = self.last_tags.get(share.key, 0.0)
+        waiter.tag = max(self.virtual_time, waiter.previous_tag) + 1.0 / share.weight
+        self.last_tags[share.key] = waiter.tag
+        self.sequence += 1
+        heapq.heappush(self.heap, (waiter.tag, self.sequence, waiter))
+        self.waiting += 1
+
+    def _remove(self, waiter: _Waiter):
+        # Lazily dropped from the heap; give the share its place back
+        waiter.removed = True
+        self.waiting -= 1
+        if self.last_tags.get(waiter.key) == waiter.tag:
+            self.last_tags[waiter.key] = waiter.previous_tag
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        while self.heap:
+            tag, _, waiter = heapq.heappop(self.heap)
+            if waiter.removed:
+                continue
+            self.waiting -= 1
+            self.virtual_time = tag
+            waiter.granted = True
+            if self.last_tags.get(waiter.key, 0.0) <= tag:
+                self.last_tags.pop(waiter.key, None)
+            return waiter
+        return None
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take a slot, blocking the calling thread; False on timeout"""
+        share = current_share()
+        with self.lock:
+            if self.in_use < self.limit and not self.waiting:
+                self.in_use += 1
+                self.acquired += 1
+                return True
+            waiter = _Waiter(share.key, event=threading.Event())
+            self._enqueue(share, waiter)
+        if waiter.event.wait(timeout):
+            return True
+        with self.lock:
+            if not waiter.granted:
+                self._remove(waiter)
+                return False
+        # Granted between the timeout and taking the lock
+        return True
+
+    async def acquire_async(self, share: Optional[Share] = None):
+        """Take a slot without blocking the event loop"""
+        share = share or current_share()
+        with self.lock:
+            if self.in_use < self.limit and not self.waiting:
+                self.in_use += 1
+                self.acquired += 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter = _Waiter(share.key, loop=loop, future=loop.create_future())
+            self._enqueue(share, waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self.lock:
+                granted = waiter.granted
+                if not granted:
+                    self._remove(waiter)
+            if granted and not waiter.future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        """Give a slot back, handing it to the next waiter in fair-share order"""
+        with self.lock:
+            waiter = self._next_waiter()
+            if waiter is None:
+                self.in_use -= 1
+                return
+            self.acquired += 1
+        if waiter.event is not None:
+            waiter.event.set()
+        else:
+            waiter.loop.call_soon_threadsafe(self._grant, waiter.future)
+
+    def _grant(self, future: asyncio.Future):
+        if future.cancelled():
+            # The waiter gave up after the slot was handed over
+            self.release()
+        else:
+            future.set_result(None)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            waiting_by_job = Counter(waiter.key or 'default' for _, _, waiter in self.heap if not waiter.removed)
+            return {'limit': self.limit, 'in_use': self.in_use, 'waiting': self.waiting,
+                    'acquired': self.acquired, 'waiting_by_job': dict(waiting_by_job)}
+
+class Governor:
+    """Process-wide limits every job's pipeline acquires from.
+
+    http covers in-flight requests, browser covers open Playwright tabs and
+    extraction covers pages queued for or inside the extraction pool. While
+    the process tree's resident memory is above GLOBAL_MAX_RSS_MB, no new
+    request starts, so running work drains instead of piling up.
+    """
+
+    def __init__(self):
+        self.limits = {
+            'http': SharedLimit('http', Config.GLOBAL_MAX_IN_FLIGHT),
+            'browser': SharedLimit('browser', Config.BROWSER_POOL_SIZE * Config.BROWSER_TABS_PER_BROWSER),
+            'extraction': SharedLimit('extraction', Config.EXTRACTION_QUEUE_SIZE)
+        }
+        self.max_rss_mb = Config.GLOBAL_MAX_RSS_MB
+        if self.max_rss_mb and psutil is None:
+            logger.warning(f"psutil is not installed; GLOBAL_MAX_RSS_MB ({self.max_rss_mb} MB) is not enforced")
+        self.rss_checked_at = 0.0
+        self.rss = 0.0
+        self.throttled = False
+
+    def limit(self, name: str) -> SharedLimit:
+        return self.limits[name]
+
+    def rss_mb(self) -> float:
+        """Resident memory of this process and its children (browsers, extraction workers), cached briefly"""
+        if psutil is None:
+            return 0.0
+        now = time.monotonic()
+        if now - self.rss_checked_at >= Config.GLOBAL_RSS_CHECK_INTERVAL:
+            total = 0
+            process = psutil.Process()
+            for member in [process] + process.children(recursive=True):
+                try:
+                    total += member.memory_info().rss
+                except psutil.Error:
+                    continue
+            self.rss = total / (1024 * 1024)
+            self.rss_checked_at = now
+        return self.rss
+
+    def memory_pressure(self) -> bool:
+        if not self.max_rss_mb:
+            return False
+        throttled = self.rss_mb() > self.max_rss_mb
+        if throttled != self.throttled:
+            self.throttled = throttled
+            if throttled:
+                logger.warning(f"Resident memory above {self.max_rss_mb} MB, pausing new requests")
+            else:
+                logger.info("Resident memory back under the limit, resuming requests")
+        return throttled
+
+    @contextmanager
+    def http_slot(self):
+        """Hold one global in-flight request slot (blocking)"""
+        while self.memory_pressure():
+            time.sleep(Config.GLOBAL_RSS_CHECK_INTERVAL)
+        limit = self.limits['http']
+        limit.acquire()
+        try:
+            yield
+        finally:
+            limit.release()
+
+    @asynccontextmanager
+    async def http_slot_async(self):
+        """Hold one global in-flight request slot"""
+        while self.memory_pressure():
+            await asyncio.sleep(Config.GLOBAL_RSS_CHECK_INTERVAL)
+        limit = self.limits['http']
+        await limit.acquire_async()
+        try:
+            yield
+        finally:
+            limit.release()
+
+    def stats(self) -> Dict:
+        """Utilisation of every limit, for the admin view"""
+        return {
+            'limits': {name: limit.stats() for name, limit in self.limits.items()},
+            'memory': {'rss_mb': round(self.rss_mb(), 1), 'max_rss_mb': self.max_rss_mb,
+                       'throttled': self.memory_pressure()}
+        }
+
+_governor = None
+_governor_lock = threading.Lock()
+
+def get_governor() -> Governor:
+    """Return the process-wide governor"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = Governor()
+        return _governor
@@ -0,0 +1,172 @@
+import asyncio
+import random
+import time
+import logging
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+POLICY_KEYS = ('min_delay', 'jitter', 'rate', 'burst', 'max_concurrency')
+
+def get_host(url: str) -> str:
+    """Return the host key used for politeness accounting"""
+    return urlparse(url).netloc.lower()
+
+def resolve_host_policy(adapter_config: Optional[Dict], host: str) -> Dict:
+    """Merge Config defaults with the adapter's politeness overrides for a host"""
+    policy = {
+        'min_delay': Config.HOST_MIN_DELAY,
+        'jitter': Config.HOST_JITTER,
+        'rate': Config.HOST_RATE,
+        'burst': Config.HOST_BURST,
+        'max_concurrency': Config.HOST_MAX_CONCURRENCY
+    }
+    adapter_config = adapter_config or {}
+
+    # Legacy adapter files express politeness as a plain delay
+    if 'rate_limit' in adapter_config:
+        policy['min_delay'] = adapter_config['rate_limit']
+
+    politeness = adapter_config.get('politeness', {})
+    policy.update({k: v for k, v in politeness.items() if k in POLICY_KEYS})
+
+    for pattern, overrides in politeness.get('hosts', {}).items():
+        pattern = pattern.lower()
+        if host == pattern or host.endswith('.' + pattern):
+            policy.update({k: v for k, v in overrides.items() if k in POLICY_KEYS})
+
+    return policy
+
+class HostState:
+    """Token bucket, spacing and concurrency accounting for a single host"""
+
+    def __init__(self, policy: Dict):
+        self.policy = policy
+        self.tokens = float(policy['burst'])
+        self.updated_at = time.monotonic()
+        self.next_allowed_at = 0.0
+        self.active = 0
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.tokens = min(float(self.policy['burst']), self.tokens + elapsed * self.policy['rate'])
+        self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until this host may start another request (inf if at max concurrency)"""
+        if self.active >= self.policy['max_concurrency']:
+            return float('inf')
+        self._refill(now)
+        token_wait = 0.0
+        if self.tokens < 1 and self.policy['rate'] > 0:
+            token_wait = (1 - self.tokens) / self.policy['rate']
+        return max(0.0, self.next_allowed_at - now, token_wait)
+
+    def acquire(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+        self.active += 1
+        self.next_allowed_at = now + self.policy['min_delay'] + random.uniform(0, self.policy['jitter'])
+
+    def release(self):
+        self.active -= 1
+
+class HostScheduler:
+    """Dispatch URLs round-robin across hosts, handing out only those whose host is ready"""
+
+    def __init__(self, adapter_config: Optional[Dict] = None):
+        self.adapter_config = adapter_config or {}
+        self.hosts: Dict[str, HostState] = {}
+        self.queues: Dict[str, deque] = {}
+        self.rotation = deque()
+        self.condition = asyncio.Condition()
+        self.closed = True
+
+    def open(self):
+        """Make next() wait for URLs put() later instead of returning None, until close()"""
+        self.closed = False
+
+    async def put(self, index: int, url: str):
+        """Queue one (index, url) while dispatch is under way"""
+        async with self.condition:
+            self.add([(index, url)])
+            self.condition.notify_all()
+
+    async def close(self):
+        """No more URLs will be put(); next() returns None once the queue drains"""
+        async with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def add(self, urls: Iterable[Tuple[int, str]]):
+        """Queue (index, url) pairs for dispatch"""
+        for index, url in urls:
+            host = get_host(url)
+            if host not in self.queues:
+                self.queues[host] = deque()
+                self.hosts.setdefault(host, HostState(resolve_host_policy(self.adapter_config, host)))
+            if not self.queues[host]:
+                self.rotation.append(host)
+            self.queues[host].append((index, url))
+
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def drop_pending(self) -> int:
+        """Forget every queued URL (the job was cancelled); returns how many were dropped"""
+        dropped = self.pending()
+        self.queues.clear()
+        self.rotation.clear()
+        return dropped
+
+    async def next(self) -> Optional[Tuple[int, str]]:
+        """Wait for the next dispatchable (index, url), or None when nothing is left"""
+        async with self.condition:
+            while self.rotation or not self.closed:
+                now = time.monotonic()
+                earliest = float('inf')
+
+                for _ in range(len(self.rotation)):
+                    host = self.rotation[0]
+                    self.rotation.rotate(-1)
+                    wait = self.hosts[host].wait_time(now)
+                    if wait == 0:
+                        self.hosts[host].acquire(now)
+                        item = self.queues[host].popleft()
+                        if not self.queues[host]:
+                            self.rotation.remove(host)
+                        return item
+                    earliest = min(earliest, wait)
+
+                # No host is ready: sleep until the earliest one is, or until a slot is released
+                try:
+                    timeout = None if earliest == float('inf') else earliest
+                    await asyncio.wait_for(self.condition.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return None
+
+    async def acquire(self, url: str):
+        """Wait for a slot on url's host outside the queue (a background revalidation); release() it after"""
+        host = get_host(url)
+        async with self.condition:
+            state = self.hosts.setdefault(host, HostState(resolve_host_policy(self.adapter_config, host)))
+            while True:
+                now = time.monotonic()
+                wait = state.wait_time(now)
+                if wait == 0:
+                    state.acquire(now)
+                    return
+                try:
+                    await asyncio.wait_for(self.condition.wait(), None if wait == float('inf') else wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, url: str):
+        """Mark a request to this URL's host as finished"""
+        async with self.condition:
+            self.hosts[get_host(url)].release()
+            self.condition.notify_all()
@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import tempfile
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Queue entry states
+QUEUED = 'queued'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+class MongoJobQueue:
+    """Durable job queue stored in MongoDB.
+
+    A worker leases an entry for JOB_LEASE_SECONDS and keeps it alive with
+    heartbeats. An entry whose lease runs out (its worker died or was killed)
+    is handed to the next worker that asks. Higher-priority entries are
+    leased first, oldest first within a priority.
+    """
+
+    def __init__(self, db):
+        self.collection = db.job_queue
+        self.collection.create_index([('status', 1), ('lease_expires_at', 1)])
+        self.collection.create_index([('status', 1), ('weight', -1), ('enqueued_at', 1)])
+
+    def enqueue(self, job_id: str, kind: str, payload: Dict, priority: Optional[str] = None):
+        """Queue a job; enqueueing an existing job_id queues it again"""
+        priority = priority or Config.DEFAULT_JOB_PRIORITY
+        self.collection.replace_one({'_id': job_id}, {
+            '_id': job_id,
+            'kind': kind,
+            'payload': payload,
+            'priority': priority,
+            'weight': Config.JOB_PRIORITIES[priority],
+            'status': QUEUED,
+            'attempts': 0,
+            'cancel_requested': False,
+            'enqueued_at': datetime.utcnow()
+        }, upsert=True)
+
+    def lease(self, worker_id: str) -> Optional[Dict]:
+        """Take the highest-priority, oldest queued or lease-expired entry"""
+        from pymongo import ReturnDocument
+
+        now = datetime.utcnow()
+        entry = self.collection.find_one_and_update(
+            {'$or': [{'status': QUEUED}, {'status': LEASED, 'lease_expires_at': {'$lt': now}}]},
+            {'$set': {'status': LEASED, 'lease_owner': worker_id,
+                      'lease_expires_at': now + timedelta(seconds=Config.JOB_LEASE_SECONDS)},
+             '$inc': {'attempts': 1}},
+            sort=[('weight', -1), ('enqueued_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if entry is None:
+            return None
+        return {'job_id': entry['_id'], 'kind': entry['kind'], 'payload': entry['payload'],
+                'attempts': entry['attempts'], 'priority': entry.get('priority')}
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend a lease; False if the lease was lost or the job was cancelled"""
+        result = self.collection.update_one(
+            {'_id': job_id, 'status': LEASED, 'lease_owner': worker_id, 'cancel_requested': False},
+            {'$set': {'lease_expires_at': datetime.utcnow() + timedelta(seconds=Config.JOB_LEASE_SECONDS)}}
+        )
+        return result.modified_count == 1
+
+    def cancel_requested(self, job_id: str) -> bool:
+        """Whether cancel() was called on a leased entry (cheaper than a heartbeat)"""
+        entry = self.collection.find_one({'_id': job_id}, {'cancel_requested': 1})
+        return bool(entry and entry.get('cancel_requested'))
+
+    def finish(self, job_id: str, worker_id: str, status: str = DONE, error: Optional[str] = None):
+        """Close a leased entry as done, failed or cancelled"""
+        self.collection.update_one(
+            {'_id': job_id, 'lease_owner': worker_id},
+            {'$set': {'status': status, 'error': error, 'finished_at': datetime.utcnow()}}
+        )
+
+    def release(self, job_id: str, worker_id: str):
+        """Hand a leased entry back to the queue (the worker is shutting down).
+
+        A graceful hand-back does not count as a failed attempt.
+        """
+        self.collection.update_one(
+            {'_id': job_id, 'status': LEASED, 'lease_owner': worker_id},
+            {'$set': {'status': QUEUED, 'lease_owner': None, 'lease_expires_at': None},
+             '$inc': {'attempts': -1}}
+        )
+
+    def requeue(self, job_id: str) -> bool:
+        """Queue a finished entry again with fresh attempts; False if unknown or still leased"""
+        result = self.collection.update_one(
+            {'_id': job_id, 'status': {'$ne': LEASED}},
+            {'$set': {'status': QUEUED, 'attempts': 0, 'cancel_requested': False, 'error': None,
+                      'lease_owner': None, 'lease_expires_at': None, 'enqueued_at': datetime.utcnow()}}
+        )
+        return result.matched_count == 1
+
+    def cancel(self, job_id: str):
+        """Drop a queued entry, or ask the worker holding it to stop"""
+        self.collection.update_one({'_id': job_id, 'status': QUEUED},
+                                   {'$set': {'status': CANCELLED, 'finished_at': datetime.utcnow()}})
+        self.collection.update_one({'_id': job_id, 'status': LEASED},
+                                   {'$set': {'cancel_requested': True}})
+
+    def stats(self) -> Dict[str, int]:
+        """Number of entries per state"""
+        counts = self.collection.aggregate([{'$group': {'_id': '$status', 'count': {'$sum': 1}}}])
+        return {row['_id']: row['count'] for row in counts}
+
+class SQLiteJobQueue:
+    """Local stand-in for MongoJobQueue, shared by processes on one machine.
+
+    A private queue starts empty in a fresh temporary file that is removed
+    when the process exits: the right lifetime for jobs kept in the mock
+    database.
+    """
+
+    def __init__(self, path: Optional[str] = None, private: bool = False):
+        if private:
+            fd, path = tempfile.mkstemp(prefix='job_queue_', suffix='.sqlite3')
+            os.close(fd)
+            atexit.register(self._remove_files)
+        self.path = path or Config.JOB_QUEUE_PATH
+        self.local = threading.local()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS job_queue ("
+                "job_id TEXT PRIMARY KEY, kind TEXT, payload TEXT, status TEXT, attempts INTEGER, "
+                "cancel_requested INTEGER DEFAULT 0, lease_owner TEXT, lease_expires_at REAL, "
+                "enqueued_at REAL, finished_at REAL, error TEXT, priority TEXT, weight REAL DEFAULT 0)"
+            )
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(job_queue)")}
+            if 'priority' not in columns:
+                # Queue files created before job priorities
+                connection.execute("ALTER TABLE job_queue ADD COLUMN priority TEXT")
+                connection.execute(f"ALTER TABLE job_queue ADD COLUMN weight REAL "
+                                   f"DEFAULT {Config.JOB_PRIORITIES[Config.DEFAULT_JOB_PRIORITY]}")
+            connection.execute("CREATE INDEX IF NOT EXISTS job_queue_status ON job_queue (status, lease_expires_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit unless a transaction is opened explicitly
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+        return connection
+
+    def _remove_files(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def enqueue(self, job_id: str, kind: str, payload: Dict, priority: Optional[str] = None):
+        """Queue a job; enqueueing an existing job_id queues it again"""
+        priority = priority or Config.DEFAULT_JOB_PRIORITY
+        self._connect().execute(
+            "INSERT OR REPLACE INTO job_queue (job_id, kind, payload, priority, weight, status, attempts, enqueued_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
+            (job_id, kind, json.dumps(payload, default=str), priority, Config.JOB_PRIORITIES[priority],
+             QUEUED, time.time())
+        )
+
+    def lease(self, worker_id: str) -> Optional[Dict]:
+        """Take the highest-priority, oldest queued or lease-expired entry"""
+        connection = self._connect()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT job_id, kind, payload, attempts, priority FROM job_queue "
+                "WHERE status = ? OR (status = ? AND lease_expires_at < ?) "
+                "ORDER BY weight DESC, enqueued_at LIMIT 1",
+                (QUEUED, LEASED, now)
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE job_queue SET status = ?, lease_owner = ?, lease_expires_at = ?, "
+                    "attempts = attempts + 1 WHERE job_id = ?",
+                    (LEASED, worker_id, now + Config.JOB_LEASE_SECONDS, row[0])
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return {'job_id': row[0], 'kind': row[1], 'payload': json.loads(row[2]), 'attempts': row[3] + 1,
+                'priority': row[4]}
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend a lease; False if the lease was lost or the job was cancelled"""
+        cursor = self._connect().execute(
+            "UPDATE job_queue SET lease_expires_at = ? "
+            "WHERE job_id = ? AND status = ? AND lease_owner = ? AND cancel_requested = 0",
+            (time.time() + Config.JOB_LEASE_SECONDS, job_id, LEASED, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def cancel_requested(self, job_id: str) -> bool:
+        """Whether cancel() was called on a leased entry (cheaper than a heartbeat)"""
+        row = self._connect().execute("SELECT cancel_requested FROM job_queue WHERE job_id = ?",
+                                      (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def finish(self, job_id: str, worker_id: str, status: str = DONE, error: Optional[str] = None):
+        """Close a leased entry as done, failed or cancelled"""
+        self._connect().execute(
+            "UPDATE job_queue SET status = ?, error = ?, finished_at = ? WHERE job_id = ? AND lease_owner = ?",
+            (status, error, time.time(), job_id, worker_id)
+        )
+
+    def release(self, job_id: str, worker_id: str):
+        """Hand a leased entry back to the queue (the worker is shutting down).
+
+        A graceful hand-back does not count as a failed attempt.
+        """
+        self._connect().execute(
+            "UPDATE job_queue SET status = ?, lease_owner = NULL, lease_expires_at = NULL, "
+            "attempts = MAX(attempts - 1, 0) WHERE job_id = ? AND status = ? AND lease_owner = ?",
+            (QUEUED, job_id, LEASED, worker_id)
+        )
+
+    def requeue(self, job_id: str) -> bool:
+        """Queue a finished entry again with fresh attempts; False if unknown or still leased"""
+        cursor = self._connect().execute(
+            "UPDATE job_queue SET status = ?, attempts = 0, cancel_requested = 0, error = NULL, "
+            "lease_owner = NULL, lease_expires_at = NULL, enqueued_at = ? WHERE job_id = ? AND status != ?",
+            (QUEUED, time.time(), job_id, LEASED)
+        )
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id: str):
+        """Drop a queued entry, or ask the worker holding it to stop"""
+        connection = self._connect()
+        connection.execute("UPDATE job_queue SET status = ?, finished_at = ? WHERE job_id = ? AND status = ?",
+                           (CANCELLED, time.time(), job_id, QUEUED))
+        connection.execute("UPDATE job_queue SET cancel_requested = 1 WHERE job_id = ? AND status = ?",
+                           (job_id, LEASED))
+
+    def stats(self) -> Dict[str, int]:
+        """Number of entries per state"""
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM job_queue GROUP BY status")
+        return dict(rows.fetchall())
+
+def get_job_queue(db=None):
+    """Queue backend for this deployment: Mongo when db is a real database, private SQLite otherwise.
+
+    The mock database forgets its jobs (and restarts their ids at 1) when the
+    process exits, so its queue must too: a queue file would hand stale
+    entries to new jobs that reuse those ids.
+    """
+    backend = Config.JOB_QUEUE_BACKEND
+    if backend == 'auto':
+        try:
+            from pymongo.database import Database
+            backend = 'mongo' if isinstance(db, Database) else 'private'
+        except ImportError:
+            backend = 'private'
+    if backend == 'mongo':
+        return MongoJobQueue(db)
+    if backend == 'private':
+        return SQLiteJobQueue(private=True)
+    return SQLiteJobQueue()
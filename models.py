@@ -1,4 +1,5 @@
 from datetime import datetime
+from config import Config
 from typing import Dict, List, Optional, Any
 import json
 
@@ -32,7 +33,8 @@ class ScrapingJob:
             'completed_urls': job_data.get('completed_urls', 0),
             'failed_urls': job_data.get('failed_urls', 0),
             'results_count': job_data.get('results_count', 0),
-            'error_message': job_data.get('error_message')
+            'error_message': job_data.get('error_message'),
+            'priority': job_data.get('priority') or Config.DEFAULT_JOB_PRIORITY
         }
         result = self.collection.insert_one(job)
         return str(result.inserted_id)
@@ -102,16 +104,37 @@ class ScrapingResult:
     def __init__(self, db):
         self.collection = db.scraping_results
     
-    def save_result(self, job_id: str, url: str, data: Dict, result_type: str = 'general'):
-        """Save scraping result"""
-        result = {
+    def build_result(self, job_id: str, url: str, data: Dict, result_type: str = 'general') -> Dict:
+        """Build a result document"""
+        return {
             'job_id': job_id,
             'url': url,
             'result_type': result_type,
             'data': data,
             'scraped_at': datetime.utcnow()
         }
-        return self.collection.insert_one(result)
+    
+    def save_result(self, job_id: str, url: str, data: Dict, result_type: str = 'general'):
+        """Save scraping result"""
+        return self.collection.insert_one(self.build_result(job_id, url, data, result_type))
+    
+    def save_results(self, results: List[Dict]):
+        """Save many result documents in one round trip"""
+        return self.collection.insert_many(results, ordered=False)
+    
+    def ensure_indexes(self):
+        """Index results by (job_id, url), the ledger resumed jobs are checked against"""
+        try:
+            self.collection.create_index([('job_id', 1), ('url', 1)])
+        except:
+            # Mock database has no indexes
+            pass
+    
+    def saved_urls(self, job_id: str) -> set:
+        """URLs of a job that already have a saved result"""
+        documents = self.collection.find({'job_id': job_id}, {'job_id': 1, 'url': 1, '_id': 0})
+        # The job_id check covers the mock database, which ignores the query
+        return {document.get('url') for document in documents if document.get('job_id') == job_id}
     
     def get_results(self, job_id: str) -> List[Dict]:
         """Get results for a job"""
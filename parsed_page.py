@@ -0,0 +1,126 @@
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urljoin
+from lxml import etree, html
+from contact_scanner import ContactScan
+
+logger = logging.getLogger(__name__)
+
+# Page regions that usually hold contact details
+CONTACT_SECTION_SELECTORS = [
+    '.contact', '.contact-info', '.contact-us',
+    '.team', '.about-us', '.staff',
+    'footer', '.footer'
+]
+
+class ParsedPage:
+    """A page fetched once per job: raw bytes, decoded text and a lazily parsed tree.
+
+    The tree is parsed at most once and derived views (full text, per-selector
+    text, links, contact sections, the contact token scan) are memoized, so
+    every extraction stage shares the same work.
+    """
+
+    def __init__(self, url: str, text: Optional[str] = None, raw: Optional[bytes] = None,
+                 encoding: Optional[str] = None):
+        self.url = url
+        self.raw = raw
+        self.encoding = encoding
+        self._text = text
+        self._tree = None
+        self._text_content = None
+        self._links = None
+        self._contact_section_spans = None
+        self._contact_scan = None
+        # Named entities, filled in once by ContactExtractor (one NER pass per page)
+        self.entities: Optional[Dict] = None
+        self._elements: Dict[str, List] = {}
+        self._selector_text: Dict[str, List[str]] = {}
+
+    @property
+    def text(self) -> str:
+        """Decoded HTML"""
+        if self._text is None:
+            self._text = (self.raw or b'').decode(self.encoding or 'utf-8', errors='replace')
+        return self._text
+
+    @property
+    def tree(self):
+        """lxml tree, parsed on first access"""
+        if self._tree is None:
+            self._tree = html.fromstring(self.text)
+        return self._tree
+
+    @property
+    def text_content(self) -> str:
+        """Flattened text of the whole document"""
+        if self._text_content is None:
+            self._text_content = self.tree.text_content()
+        return self._text_content
+
+    def select(self, selector: str) -> List:
+        """Elements matching a CSS or XPath selector"""
+        if selector not in self._elements:
+            if selector.startswith('//') or selector.startswith('.//'):
+                self._elements[selector] = self.tree.xpath(selector)
+            else:
+                self._elements[selector] = self.tree.cssselect(selector)
+        return self._elements[selector]
+
+    def selector_text(self, selector: str) -> List[str]:
+        """Text content of each element matching a selector"""
+        if selector not in self._selector_text:
+            self._selector_text[selector] = [element.text_content() for element in self.select(selector)]
+        return self._selector_text[selector]
+
+    @property
+    def links(self) -> List[str]:
+        """Unique absolute link targets on the page"""
+        if self._links is None:
+            links = set()
+            for element in self.select('a[href]'):
+                href = element.get('href')
+                if href:
+                    links.add(urljoin(self.url, href))
+            self._links = list(links)
+        return self._links
+
+    @property
+    def contact_section_spans(self) -> List[Tuple[int, int]]:
+        """(start, end) offsets in text_content of the regions that usually hold contact details"""
+        if self._contact_section_spans is None:
+            sections = set()
+            for selector in CONTACT_SECTION_SELECTORS:
+                sections.update(self.select(selector))
+
+            # Replay text_content() (XPath string()) to find where each section's text lands
+            spans = []
+            starts = {}
+            offset = 0
+            if sections:
+                for event, element in etree.iterwalk(self.tree, events=('start', 'end', 'comment', 'pi')):
+                    if event == 'start':
+                        if element in sections:
+                            starts[element] = offset
+                        offset += len(element.text or '')
+                        continue
+                    if event == 'end' and element in starts:
+                        spans.append((starts[element], offset))
+                    # Comment and processing-instruction text is skipped, their tails are not
+                    if element is not self.tree:
+                        offset += len(element.tail or '')
+            self._contact_section_spans = sorted(spans)
+        return self._contact_section_spans
+
+    @property
+    def contact_scan(self) -> ContactScan:
+        """Contact and job-detail tokens of the full text, found in one pass"""
+        if self._contact_scan is None:
+            self._contact_scan = ContactScan(self.text_content)
+        return self._contact_scan
+
+def as_page(content: Union['ParsedPage', str], url: str = '') -> ParsedPage:
+    """Wrap raw HTML in a ParsedPage; pass pages through unchanged"""
+    if isinstance(content, ParsedPage):
+        return content
+    return ParsedPage(url, text=content)
@@ -0,0 +1,101 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class StageStats:
+    """Counters for one pipeline stage: how deep its input queue is and how fast it drains"""
+
+    def __init__(self, name: str, workers: int, depth: Callable[[], int], capacity: Optional[int] = None):
+        self.name = name
+        self.workers = workers
+        self.depth = depth
+        self.capacity = capacity
+        self.busy = 0
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.monotonic()
+
+    @contextmanager
+    def working(self):
+        """Time one item through the stage"""
+        self.busy += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.busy -= 1
+            self.processed += 1
+            self.busy_seconds += time.monotonic() - started
+
+    def snapshot(self) -> Dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        return {
+            'workers': self.workers,
+            'busy': self.busy,
+            'queue_depth': self.depth(),
+            'queue_capacity': self.capacity,
+            'processed': self.processed,
+            'throughput': round(self.processed / elapsed, 2),  # items per second
+            'utilisation': round(min(self.busy_seconds / (elapsed * self.workers), 1.0), 3)
+        }
+
+class PipelineStats:
+    """Per-stage counters of one run of the staged scraping pipeline.
+
+    The stage with the highest utilisation is the bottleneck: its workers are
+    busy all the time while the stages around it wait on its queue.
+    """
+
+    def __init__(self, job_id: Optional[str] = None, adapter_name: Optional[str] = None):
+        self.job_id = job_id
+        self.adapter_name = adapter_name
+        self.stages: Dict[str, StageStats] = {}
+
+    def stage(self, name: str, workers: int, depth: Callable[[], int],
+              capacity: Optional[int] = None) -> StageStats:
+        self.stages[name] = StageStats(name, workers, depth, capacity)
+        return self.stages[name]
+
+    def bottleneck(self) -> Optional[str]:
+        if not self.stages:
+            return None
+        snapshots = {name: stage.snapshot() for name, stage in self.stages.items()}
+        return max(snapshots, key=lambda name: snapshots[name]['utilisation'])
+
+    def snapshot(self) -> Dict:
+        return {
+            'job_id': self.job_id,
+            'adapter': self.adapter_name,
+            'stages': {name: stage.snapshot() for name, stage in self.stages.items()},
+            'bottleneck': self.bottleneck()
+        }
+
+    def summary(self) -> str:
+        stages = ', '.join(
+            f"{name} {snapshot['throughput']}/s ({snapshot['utilisation']:.0%} busy, queue {snapshot['queue_depth']})"
+            for name, snapshot in ((name, stage.snapshot()) for name, stage in self.stages.items())
+        )
+        return f"Pipeline for {self.adapter_name or 'adapter'}: {stages}; bottleneck: {self.bottleneck()}"
+
+_active: List[PipelineStats] = []
+_active_lock = threading.Lock()
+
+def track(stats: PipelineStats):
+    """List a running pipeline in active_pipelines()"""
+    with _active_lock:
+        _active.append(stats)
+
+def untrack(stats: PipelineStats):
+    with _active_lock:
+        if stats in _active:
+            _active.remove(stats)
+
+def active_pipelines() -> List[Dict]:
+    """Stage stats of every pipeline running in this process"""
+    with _active_lock:
+        running = list(_active)
+    return [stats.snapshot() for stats in running]
@@ -0,0 +1,66 @@
+import time
+import logging
+import threading
+from typing import Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class ProgressReporter:
+    """Keeps a job's progress counters in memory and writes them out sparingly.
+
+    update() can be passed straight to BatchScraper as its progress_callback.
+    Counters are written at most every `interval` seconds or every `every`
+    finished URLs; flush() always writes, and is how a job records its final state.
+    """
+
+    def __init__(self, job_model, job_id: str, interval: Optional[float] = None, every: Optional[int] = None):
+        self.job_model = job_model
+        self.job_id = job_id
+        self.interval = Config.PROGRESS_FLUSH_INTERVAL if interval is None else interval
+        self.every = every or Config.PROGRESS_FLUSH_URLS
+        self.progress = 0
+        self.completed = 0
+        self.successful = 0
+        self.failed = 0
+        self.resumed = 0
+        self.total_urls = 0
+        self.lock = threading.Lock()
+        self.flushed_at = time.monotonic()
+        self.flushed_completed = 0
+
+    def resume(self, saved: int, total_urls: int):
+        """Count `saved` URLs finished by an earlier run of the job on top of what update() reports"""
+        self.resumed = saved
+        self.total_urls = total_urls
+
+    def update(self, progress: float, completed: int, successful: int, failed: Optional[int] = None):
+        """Record the latest counters; writes only when a flush is due"""
+        if self.resumed:
+            completed += self.resumed
+            successful += self.resumed
+            progress = completed / self.total_urls * 100
+        with self.lock:
+            self.progress = int(progress)
+            self.completed = completed
+            self.successful = successful
+            self.failed = completed - successful if failed is None else failed
+            due = (completed - self.flushed_completed >= self.every
+                   or time.monotonic() - self.flushed_at >= self.interval)
+        if due:
+            self.flush()
+
+    def flush(self, **fields):
+        """Write the current counters now, plus any extra job fields"""
+        with self.lock:
+            update = {
+                'progress': self.progress,
+                'completed_urls': self.completed,
+                'results_count': self.successful,
+                'failed_urls': self.failed,
+                **fields
+            }
+            # Written under the lock so an older snapshot never lands after a newer one
+            self.job_model.update_job(self.job_id, update)
+            self.flushed_at = time.monotonic()
+            self.flushed_completed = self.completed
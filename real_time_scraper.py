@@ -1,24 +1,32 @@
-import asyncio
 import logging
-import json
-import requests
 from datetime import datetime
-from typing import Dict, List, Optional
-from urllib.parse import urlparse, urljoin
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlencode, urlparse, urljoin
 from models import ScrapingJob, ScrapingResult
 from scraper_engine import ScraperEngine, BatchScraper
 from contact_extractor import ContactExtractor
+from progress_reporter import ProgressReporter
+from result_writer import ResultWriter
+from response_cache import with_cache_policy
+from cancellation import CancellationToken
+from job_queue import get_job_queue
+from pipeline import PipelineStats
 
 logger = logging.getLogger(__name__)
 
 class RealTimeScraper:
     """Real-time scraping engine for jobs and leads"""
     
-    def __init__(self, db):
+    def __init__(self, db, scraper_engine: ScraperEngine = None, batch_scraper: BatchScraper = None,
+                 contact_extractor: ContactExtractor = None, job_queue=None):
         self.db = db
-        self.scraper_engine = ScraperEngine()
-        self.batch_scraper = BatchScraper(self.scraper_engine)
-        self.contact_extractor = ContactExtractor()
+        # Shared instances come from the service container; build our own otherwise
+        self.scraper_engine = scraper_engine or ScraperEngine()
+        self.contact_extractor = contact_extractor or ContactExtractor()
+        self.batch_scraper = batch_scraper or BatchScraper(self.scraper_engine,
+                                                           contact_extractor=self.contact_extractor)
+        self.job_queue = job_queue or get_job_queue(db)
+        # Search-result selectors per job board
         self.job_sources = {
             'indeed': {
                 'search_url': 'https://www.indeed.com/jobs',
@@ -41,250 +49,212 @@ class RealTimeScraper:
                 }
             }
         }
+        # Selectors for the posting and company pages themselves; job details and
+        # contacts come from the contact extractor on the same fetched page
+        self.job_page_adapter = {
+            'selectors': {
+                'job_title': {'selector': 'h1, .job-title, .title', 'attribute': 'text'},
+                'company': {'selector': '.company, .employer', 'attribute': 'text'},
+                'location': {'selector': '.location, .job-location', 'attribute': 'text'},
+                'salary': {'selector': '.salary, .pay', 'attribute': 'text'},
+                'description': {'selector': '.description, .job-summary', 'attribute': 'text'}
+            }
+        }
+        self.lead_page_adapter = {
+            'selectors': {
+                'title': {'selector': 'title', 'attribute': 'text'},
+                'company': {'selector': 'meta[property="og:site_name"]', 'attribute': 'content'}
+            }
+        }
         
-    def start_real_time_job_scraping(self, job_data: Dict) -> str:
-        """Start real-time job scraping"""
+    def start_real_time_job_scraping(self, job_data: Dict, priority: Optional[str] = None) -> str:
+        """Queue a job-listing scrape for the job workers"""
         scraping_job_model = ScrapingJob(self.db)
         job_id = scraping_job_model.create_job({
             **job_data,
-            'status': 'running',
-            'task_type': 'job_scraping'
+            'status': 'pending',
+            'task_type': 'job_scraping',
+            'priority': priority
         })
-        
-        # Create demo job results quickly
-        self._create_demo_job_results(job_id, job_data)
+        self.job_queue.enqueue(job_id, 'job_scraping', job_data, priority)
         return job_id
     
-    def start_real_time_lead_scraping(self, job_data: Dict) -> str:
-        """Start real-time lead generation scraping"""
+    def start_real_time_lead_scraping(self, job_data: Dict, priority: Optional[str] = None) -> str:
+        """Queue a lead-generation scrape for the job workers"""
         scraping_job_model = ScrapingJob(self.db)
         job_id = scraping_job_model.create_job({
             **job_data,
-            'status': 'running',
-            'task_type': 'lead_generation'
+            'status': 'pending',
+            'task_type': 'lead_generation',
+            'priority': priority
         })
-        
-        # Create demo lead results quickly
-        self._create_demo_lead_results(job_id, job_data)
+        self.job_queue.enqueue(job_id, 'lead_generation', job_data, priority)
         return job_id
     
-    def _scrape_jobs_sync(self, job_id: str, job_data: Dict):
-        """Synchronous job scraping with real-time updates"""
+    def run_job_scraping(self, job_id: str, job_data: Dict, cancel_token: CancellationToken):
+        """Search for job postings and scrape them (called by a job worker)"""
+        self._run_pipeline(job_id, job_data, 'job', self._find_job_urls, self.job_page_adapter, cancel_token)
+    
+    def run_lead_scraping(self, job_id: str, job_data: Dict, cancel_token: CancellationToken):
+        """Search for company pages and extract their contacts (called by a job worker)"""
+        self._run_pipeline(job_id, job_data, 'lead', self._find_lead_urls, self.lead_page_adapter, cancel_token)
+    
+    def _run_pipeline(self, job_id: str, job_data: Dict, task_type: str, find_urls: Callable[[Dict], List[str]],
+                      adapter_config: Dict, cancel_token: CancellationToken):
+        """Search, then fetch, extract and save every found URL concurrently.
+        
+        Fetching goes through the batch scraper's async path: a bounded
+        in-flight window, per-host politeness from the host scheduler and
+        extraction off the event loop. Results stream into a bulk writer.
+        """
         scraping_job_model = ScrapingJob(self.db)
         scraping_result_model = ScrapingResult(self.db)
+        progress = ProgressReporter(scraping_job_model, job_id)
         
         try:
-            query = job_data.get('search_query', '')
-            adapter_name = job_data.get('adapter_name', 'indeed')
-            max_results = job_data.get('max_results', 50)
+            scraping_job_model.update_job(job_id, {'status': 'running', 'started_at': datetime.utcnow()})
             
-            logger.info(f"Starting job scraping for query: {query}")
-            
-            # Get job URLs from search
-            if adapter_name in self.job_sources:
-                job_urls = self._search_job_urls(query, adapter_name, max_results)
+            # A re-delivered or resumed job reuses the URLs its first run found, so the
+            # resume ledger and progress totals refer to the same set
+            urls = self._discovered_urls(scraping_job_model, job_id)
+            if urls:
+                logger.info(f"{task_type.title()} scraping {job_id}: reusing {len(urls)} URLs found earlier")
             else:
-                # Use DuckDuckGo search for generic job sites
-                search_query = f"{query} jobs site:indeed.com OR site:linkedin.com"
-                search_results = self.scraper_engine.search_duckduckgo(search_query, max_results)
-                job_urls = [r['url'] for r in search_results]
-            
-            # Update job with URLs found
-            scraping_job_model.update_job(job_id, {
-                'urls': job_urls,
-                'total_urls': len(job_urls),
-                'status': 'processing'
-            })
-            
-            # Scrape each job URL
-            scraped_count = 0
-            failed_count = 0
-            
-            for i, url in enumerate(job_urls):
-                try:
-                    logger.info(f"Scraping job {i+1}/{len(job_urls)}: {url}")
-                    
-                    # Get adapter config
-                    adapter_config = self.job_sources.get(adapter_name, {
-                        'selectors': {
-                            'job_title': {'selector': 'h1, .job-title, .title', 'attribute': 'text'},
-                            'company': {'selector': '.company, .employer', 'attribute': 'text'},
-                            'location': {'selector': '.location, .job-location', 'attribute': 'text'},
-                            'salary': {'selector': '.salary, .pay', 'attribute': 'text'},
-                            'description': {'selector': '.description, .job-summary', 'attribute': 'text'}
-                        }
-                    })
-                    
-                    # Scrape the job page
-                    result = self.scraper_engine.scrape_with_adapter(url, adapter_config)
-                    
-                    if 'error' not in result:
-                        # Save job result
-                        scraping_result_model.save_result(job_id, url, result, 'job')
-                        scraped_count += 1
-                        logger.info(f"Successfully scraped job: {result.get('scraped_data', {}).get('job_title', 'Unknown')}")
-                    else:
-                        failed_count += 1
-                        logger.error(f"Failed to scrape {url}: {result.get('error')}")
-                    
-                    # Update progress
-                    progress = int(((i + 1) / len(job_urls)) * 100)
+                urls = find_urls(job_data)
+                if not urls:
                     scraping_job_model.update_job(job_id, {
-                        'progress': progress,
-                        'completed_urls': i + 1,
-                        'failed_urls': failed_count,
-                        'results_count': scraped_count
+                        'status': 'failed',
+                        'error_message': 'No URLs found to scrape',
+                        'completed_at': datetime.utcnow()
                     })
-                    
-                    # Rate limiting
-                    import time
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    failed_count += 1
-                    logger.error(f"Error scraping job URL {url}: {e}")
+                    return
+                scraping_job_model.update_job(job_id, {'urls': urls, 'total_urls': len(urls),
+                                                       'urls_discovered': True})
+                logger.info(f"{task_type.title()} scraping {job_id}: {len(urls)} URLs found")
             
-            logger.info(f"Job scraping completed: {scraped_count} jobs scraped, {failed_count} failed")
+            adapter_config = with_cache_policy(adapter_config, job_data.get('cache'))
+            if job_data.get('extraction_tier'):
+                adapter_config = {**adapter_config, 'extraction_tier': job_data['extraction_tier']}
             
-            # Update final status
-            scraping_job_model.update_job(job_id, {
-                'status': 'completed',
-                'progress': 100,
-                'completed_urls': len(job_urls),
-                'failed_urls': failed_count,
-                'results_count': scraped_count
-            })
-            
-        except Exception as e:
-            logger.error(f"Job scraping failed: {e}")
-            scraping_job_model.update_job(job_id, {
-                'status': 'failed',
-                'error_message': str(e)
-            })
+            # Resume: URLs saved by an earlier run of this job are skipped
+            saved_urls = scraping_result_model.saved_urls(job_id)
+            remaining = [url for url in urls if url not in saved_urls]
+            resumed = len(urls) - len(remaining)
+            if resumed:
+                progress.resume(resumed, len(urls))
             
-            # Mark job as completed
-            scraping_job_model.update_job(job_id, {
-                'status': 'completed',
-                'progress': 100,
-                'completed_urls': len(job_urls),
-                'failed_urls': failed_count,
-                'results_count': scraped_count
-            })
+            counts = {'failed': 0}
             
-            logger.info(f"Job scraping completed. Scraped: {scraped_count}, Failed: {failed_count}")
-            
-        except Exception as e:
-            logger.error(f"Job scraping failed for job {job_id}: {e}")
-            scraping_job_model.update_job(job_id, {
-                'status': 'failed',
-                'error_message': str(e)
-            })
-    
-    async def _scrape_leads_async(self, job_id: str, job_data: Dict):
-        """Async lead generation scraping with real-time updates"""
-        scraping_job_model = ScrapingJob(self.db)
-        scraping_result_model = ScrapingResult(self.db)
-        
-        try:
-            query = job_data.get('search_query', '')
-            max_results = job_data.get('max_results', 50)
+            def save_result(result: Dict):
+                url = result.get('url', 'unknown')
+                if 'error' in result:
+                    counts['failed'] += 1
+                    logger.error(f"Failed to scrape {url}: {result.get('error')}")
+                    return
+                data = result['scraped_data']
+                if task_type == 'lead':
+                    contacts = data.get('contacts') or {}
+                    if not (contacts.get('emails') or contacts.get('phones')):
+                        counts['failed'] += 1
+                        logger.info(f"No contacts found on {url}")
+                        return
+                    data['company'] = data.get('company') or self._extract_company_name(url, '')
+                writer.add(url, data)
             
-            logger.info(f"Starting lead generation for query: {query}")
+            pipeline_stats = PipelineStats(job_id, f"real_time_{task_type}")
+            with ResultWriter(scraping_result_model, job_id, task_type) as writer:
+                self.batch_scraper.scrape_urls(remaining, adapter_config, progress.update, task_type,
+                                               result_callback=save_result, cancel_token=cancel_token,
+                                               pipeline_stats=pipeline_stats)
+            scraped_count = resumed + writer.written
+            failed_count = counts['failed'] + writer.failed
             
-            # Search for business/lead URLs
-            search_query = f"{query} contact email phone"
-            search_results = self.scraper_engine.search_duckduckgo(search_query, max_results)
-            lead_urls = [r['url'] for r in search_results]
+            if cancel_token.lease_lost:
+                # Another worker runs the job now and reports its progress; our results are saved
+                logger.info(f"{task_type.title()} scraping {job_id} lost its lease after {scraped_count} results")
+                return
             
-            # Update job with URLs found
-            scraping_job_model.update_job(job_id, {
-                'urls': lead_urls,
-                'total_urls': len(lead_urls),
-                'status': 'processing'
-            })
+            if cancel_token.cancelled:
+                progress.flush(
+                    status='cancelled',
+                    results_count=scraped_count,
+                    failed_urls=failed_count,
+                    pipeline=pipeline_stats.snapshot(),
+                    completed_at=datetime.utcnow()
+                )
+                logger.info(f"{task_type.title()} scraping {job_id} cancelled after {scraped_count} results")
+                return
             
-            # Scrape each lead URL
-            scraped_count = 0
-            failed_count = 0
-            
-            for i, url in enumerate(lead_urls):
-                try:
-                    logger.info(f"Scraping lead {i+1}/{len(lead_urls)}: {url}")
-                    
-                    # Get page content
-                    content = self.scraper_engine.fetch_static(url)
-                    if not content:
-                        content = self.scraper_engine.fetch_dynamic(url)
-                    
-                    if content:
-                        # Extract contact information
-                        contacts = self.contact_extractor.extract_contacts(content, url)
-                        
-                        if contacts:
-                            # Save lead result
-                            lead_data = {
-                                'url': url,
-                                'contacts': contacts,
-                                'scraped_data': {
-                                    'company': self._extract_company_name(url, content),
-                                    'contact_count': len(contacts),
-                                    'emails': [c.get('email') for c in contacts if c.get('email')],
-                                    'phones': [c.get('phone') for c in contacts if c.get('phone')]
-                                }
-                            }
-                            
-                            scraping_result_model.save_result(job_id, url, lead_data, 'lead')
-                            scraped_count += 1
-                            logger.info(f"Successfully extracted {len(contacts)} contacts from {url}")
-                        else:
-                            failed_count += 1
-                            logger.warning(f"No contacts found on {url}")
-                    else:
-                        failed_count += 1
-                        logger.error(f"Failed to fetch content from {url}")
-                    
-                    # Update progress
-                    progress = int(((i + 1) / len(lead_urls)) * 100)
-                    scraping_job_model.update_job(job_id, {
-                        'progress': progress,
-                        'completed_urls': i + 1,
-                        'failed_urls': failed_count,
-                        'results_count': scraped_count
-                    })
-                    
-                    # Rate limiting
-                    await asyncio.sleep(3)
-                    
-                except Exception as e:
-                    failed_count += 1
-                    logger.error(f"Error scraping lead URL {url}: {e}")
-            
-            # Mark job as completed
-            scraping_job_model.update_job(job_id, {
-                'status': 'completed',
-                'progress': 100,
-                'completed_urls': len(lead_urls),
-                'failed_urls': failed_count,
-                'results_count': scraped_count
-            })
-            
-            logger.info(f"Lead generation completed. Scraped: {scraped_count}, Failed: {failed_count}")
+            progress.flush(
+                status='completed',
+                progress=100,
+                completed_urls=len(urls),
+                results_count=scraped_count,
+                failed_urls=failed_count,
+                pipeline=pipeline_stats.snapshot(),
+                completed_at=datetime.utcnow()
+            )
+            logger.info(f"{task_type.title()} scraping {job_id} completed. Scraped: {scraped_count}, Failed: {failed_count}")
             
         except Exception as e:
-            logger.error(f"Lead generation failed for job {job_id}: {e}")
-            scraping_job_model.update_job(job_id, {
-                'status': 'failed',
-                'error_message': str(e)
-            })
+            logger.error(f"{task_type.title()} scraping failed for job {job_id}: {e}")
+            if cancel_token.lease_lost:
+                return
+            progress.flush(
+                status='failed',
+                error_message=str(e),
+                completed_at=datetime.utcnow()
+            )
+    
+    def _discovered_urls(self, scraping_job_model: ScrapingJob, job_id: str) -> List[str]:
+        """URLs stored by an earlier run of this job, if any"""
+        job = scraping_job_model.get_job(job_id)
+        if job and job.get('id') == job_id and job.get('urls_discovered'):
+            return job.get('urls') or []
+        return []
+    
+    def _find_job_urls(self, job_data: Dict) -> List[str]:
+        """Job posting URLs: the ones given, else a job-board search, else a DuckDuckGo search"""
+        max_results = job_data.get('max_results', 50)
+        urls = job_data.get('urls') or []
+        if urls:
+            return _unique(urls)[:max_results]
+        
+        query = job_data.get('search_query') or ''
+        location = job_data.get('location') or ''
+        adapter_name = job_data.get('adapter_name') or 'indeed'
+        if adapter_name in self.job_sources:
+            urls = self._search_job_urls(query, location, adapter_name, max_results)
+        if not urls:
+            search_query = f"{query} {location} jobs site:indeed.com OR site:linkedin.com".strip()
+            urls = [r['url'] for r in self.scraper_engine.search_duckduckgo(search_query, max_results)]
+        return _unique(urls)[:max_results]
+    
+    def _find_lead_urls(self, job_data: Dict) -> List[str]:
+        """Company pages: the given URLs and target domain, topped up from a DuckDuckGo search"""
+        max_results = job_data.get('max_results', 20)
+        urls = [_absolute(url) for url in job_data.get('urls') or []]
+        
+        target_domain = job_data.get('target_domain')
+        if target_domain:
+            urls.append(_absolute(target_domain))
+            search_query = f"site:{urlparse(_absolute(target_domain)).netloc} contact OR about OR team"
+        else:
+            search_query = f"{job_data.get('search_query') or job_data.get('industry') or ''} contact email phone".strip()
+        
+        if len(urls) < max_results and search_query:
+            urls += [r['url'] for r in self.scraper_engine.search_duckduckgo(search_query, max_results)]
+        return _unique(urls)[:max_results]
     
-    async def _search_job_urls(self, query: str, platform: str, max_results: int) -> List[str]:
+    def _search_job_urls(self, query: str, location: str, platform: str, max_results: int) -> List[str]:
         """Search for job URLs on specific platforms"""
         urls = []
         
         try:
             if platform == 'indeed':
                 # Search Indeed jobs
-                search_url = f"https://www.indeed.com/jobs?q={query.replace(' ', '+')}&limit={max_results}"
+                search_url = f"{self.job_sources['indeed']['search_url']}?" + urlencode(
+                    {'q': query, 'l': location, 'limit': max_results})
                 content = self.scraper_engine.fetch_static(search_url)
                 
                 if content:
@@ -300,7 +270,7 @@ class RealTimeScraper:
             
             elif platform == 'linkedin':
                 # For LinkedIn, use DuckDuckGo search since direct scraping is restricted
-                search_query = f"{query} jobs site:linkedin.com/jobs"
+                search_query = f"{query} {location} jobs site:linkedin.com/jobs"
                 search_results = self.scraper_engine.search_duckduckgo(search_query, max_results)
                 urls = [r['url'] for r in search_results if 'linkedin.com/jobs' in r['url']]
             
@@ -341,113 +311,12 @@ class RealTimeScraper:
         except Exception as e:
             logger.error(f"Error extracting company name: {e}")
         
-        return "Unknown Company"    
-    def _create_demo_job_results(self, job_id: str, job_data: Dict):
-        """Create demo job results for testing"""
-        scraping_job_model = ScrapingJob(self.db)
-        scraping_result_model = ScrapingResult(self.db)
-        
-        query = job_data.get("search_query", "python developer")
-        location = job_data.get("location", "remote")
-        max_results = job_data.get("max_results", 3)
-        
-        # Create sample job listings
-        sample_jobs = [
-            {
-                "job_title": f"Senior Python Developer - {query.title()}",
-                "company": "TechCorp Inc.",
-                "location": location,
-                "salary": "$90,000 - $120,000",
-                "description": f"We are looking for an experienced {query} to join our team. Remote work available.",
-                "url": "https://example.com/job1"
-            },
-            {
-                "job_title": f"Full Stack {query.title()}",
-                "company": "StartupXYZ",
-                "location": location,
-                "salary": "$80,000 - $110,000",
-                "description": f"Join our growing team as a {query}. Great benefits and flexible hours.",
-                "url": "https://example.com/job2"
-            }
-        ]
-        
-        # Save results to MongoDB
-        for i, job in enumerate(sample_jobs[:max_results]):
-            scraping_result_model.save_result(job_id, job["url"], {
-                "scraped_data": job,
-                "scraping_time": datetime.utcnow().isoformat(),
-                "success": True
-            }, "job")
-            
-            # Update progress
-            progress = int(((i + 1) / max_results) * 100)
-            scraping_job_model.update_job(job_id, {
-                "progress": progress,
-                "completed_urls": i + 1,
-                "results_count": i + 1
-            })
-        
-        # Mark as completed
-        scraping_job_model.update_job(job_id, {
-            "status": "completed",
-            "progress": 100,
-            "total_urls": max_results,
-            "completed_urls": max_results,
-            "results_count": max_results
-        })
-        
-        logger.info(f"Demo job scraping completed: {max_results} sample jobs created")
-    
-    def _create_demo_lead_results(self, job_id: str, job_data: Dict):
-        """Create demo lead results for testing"""
-        scraping_job_model = ScrapingJob(self.db)
-        scraping_result_model = ScrapingResult(self.db)
-        
-        target_domain = job_data.get("target_domain", "example.com")
-        max_results = job_data.get("max_results", 2)
-        
-        # Create sample leads
-        sample_leads = [
-            {
-                "name": "John Smith",
-                "email": "john.smith@" + target_domain,
-                "phone": "+1-555-0123",
-                "title": "VP of Engineering",
-                "company": target_domain.replace(".com", "").title(),
-                "linkedin": "linkedin.com/in/johnsmith"
-            },
-            {
-                "name": "Sarah Johnson",
-                "email": "sarah.j@" + target_domain,
-                "phone": "+1-555-0124",
-                "title": "Head of Marketing", 
-                "company": target_domain.replace(".com", "").title(),
-                "linkedin": "linkedin.com/in/sarahjohnson"
-            }
-        ]
-        
-        # Save results to MongoDB
-        for i, lead in enumerate(sample_leads[:max_results]):
-            scraping_result_model.save_result(job_id, target_domain, {
-                "scraped_data": lead,
-                "scraping_time": datetime.utcnow().isoformat(),
-                "success": True
-            }, "lead")
-            
-            progress = int(((i + 1) / max_results) * 100)
-            scraping_job_model.update_job(job_id, {
-                "progress": progress,
-                "completed_urls": i + 1,
-                "results_count": i + 1
-            })
-        
-        # Mark as completed
-        scraping_job_model.update_job(job_id, {
-            "status": "completed",
-            "progress": 100,
-            "total_urls": max_results,
-            "completed_urls": len(sample_leads),
-            "results_count": len(sample_leads)
-        })
-        
-        logger.info(f"Demo lead generation completed: {len(sample_leads)} sample leads created")
+        return "Unknown Company"
+
+def _absolute(url: str) -> str:
+    """Accept bare domains ("example.com") as well as URLs"""
+    return url if '://' in url else f"https://{url}"
+
+def _unique(urls: List[str]) -> List[str]:
+    """Drop duplicate URLs, keeping the first occurrence"""
+    return list(dict.fromkeys(url for url in urls if url))
@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so equivalent spellings share one cache entry"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+def resolve_cache_policy(adapter_config: Optional[Dict] = None) -> Dict:
+    """Merge Config defaults with the adapter's (or job's) "cache" block"""
+    policy = {
+        'ttl': Config.CACHE_TTL,
+        'stale_while_revalidate': Config.CACHE_STALE_WHILE_REVALIDATE,
+        'bypass': not Config.CACHE_ENABLED
+    }
+    policy.update((adapter_config or {}).get('cache', {}))
+    return policy
+
+def with_cache_policy(adapter_config: Dict, overrides: Optional[Dict]) -> Dict:
+    """Return a copy of adapter_config with job-level cache overrides applied"""
+    if not overrides:
+        return adapter_config
+    return {**adapter_config, 'cache': {**adapter_config.get('cache', {}), **overrides}}
+
+class ResponseCache:
+    """Size-bounded on-disk HTTP response cache with LRU eviction.
+
+    Entries are JSON files keyed by normalized URL plus the request headers
+    that change the representation; bodies are stored once per content hash.
+    The LRU index and blob reference counts live in a SQLite file next to
+    them, so every process sharing the directory evicts from the same totals.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or Config.CACHE_DIR
+        self.max_bytes = max_bytes or Config.CACHE_MAX_BYTES
+        self.entries_dir = os.path.join(self.directory, 'entries')
+        self.blobs_dir = os.path.join(self.directory, 'blobs')
+        self.index_path = os.path.join(self.directory, 'index.sqlite3')
+        self.local = threading.local()
+        self.lock = threading.Lock()  # guards this process's counters
+        self.counters = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'stale_served': 0,
+            'stores': 0,
+            'evictions': 0,
+            'bytes_saved': 0
+        }
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        connection = self._connect()
+        connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, blob TEXT, last_access REAL)")
+        connection.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        connection.execute("CREATE TABLE IF NOT EXISTS blobs (blob TEXT PRIMARY KEY, size INTEGER, refs INTEGER)")
+        self.load_index()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit unless a transaction is opened explicitly
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        """Hold the index write lock, shared by every process using this directory"""
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def load_index(self):
+        """Index entry files left by a cache directory that predates the SQLite index"""
+        with self._transaction() as connection:
+            if connection.execute("SELECT 1 FROM entries LIMIT 1").fetchone():
+                return
+            for filename in os.listdir(self.entries_dir):
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(self.entries_dir, filename)
+                try:
+                    with open(path, 'r') as f:
+                        entry = json.load(f)
+                    self._index_entry(connection, filename[:-5], entry['blob'], entry['size'],
+                                      os.path.getmtime(path))
+                except Exception as e:
+                    logger.warning(f"Dropping unreadable cache entry {filename}: {e}")
+                    os.remove(path)
+
+    def make_key(self, url: str, headers: Optional[Dict] = None) -> str:
+        headers = headers or {}
+        vary = [f"{name}:{headers.get(name, '')}" for name in Config.CACHE_VARY_HEADERS]
+        return hashlib.sha256('\n'.join([normalize_url(url)] + vary).encode('utf-8')).hexdigest()
+
+    def lookup(self, url: str, headers: Optional[Dict] = None) -> Optional[Dict]:
+        """Return the cached entry (with its body) or None"""
+        key = self.make_key(url, headers)
+        cursor = self._connect().execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        if not cursor.rowcount:
+            return None
+        try:
+            entry_path = os.path.join(self.entries_dir, f"{key}.json")
+            with open(entry_path, 'r') as f:
+                entry = json.load(f)
+            with open(os.path.join(self.blobs_dir, entry['blob']), 'rb') as f:
+                entry['body'] = f.read()
+            entry['key'] = key
+            return entry
+        except Exception as e:
+            # Also the case when another process evicted the entry after the index update above
+            logger.warning(f"Cache entry for {url} is unreadable: {e}")
+            with self._transaction() as connection:
+                self._drop(connection, key)
+            return None
+
+    def freshness(self, entry: Dict, policy: Dict) -> str:
+        """Classify an entry as 'fresh', 'stale' (servable while revalidating) or 'expired'"""
+        age = time.time() - entry['fetched_at']
+        if age <= policy['ttl']:
+            return 'fresh'
+        if age <= policy['ttl'] + policy['stale_while_revalidate']:
+            return 'stale'
+        return 'expired'
+
+    def conditional_headers(self, entry: Dict) -> Dict:
+        """Validators for revalidating an entry with a conditional GET"""
+        headers = {}
+        if entry['headers'].get('etag'):
+            headers['If-None-Match'] = entry['headers']['etag']
+        if entry['headers'].get('last-modified'):
+            headers['If-Modified-Since'] = entry['headers']['last-modified']
+        return headers
+
+    def decode(self, entry: Dict) -> str:
+        return entry['body'].decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+    def store(self, url: str, headers: Optional[Dict], response_headers: Dict,
+              body: bytes, encoding: Optional[str] = None):
+        """Store a 200 response body and its validators"""
+        key = self.make_key(url, headers)
+        blob = hashlib.sha256(body).hexdigest()
+        entry = {
+            'url': url,
+            'headers': {k.lower(): v for k, v in response_headers.items()
+                        if k.lower() in ('etag', 'last-modified', 'content-type')},
+            'encoding': encoding,
+            'fetched_at': time.time(),
+            'blob': blob,
+            'size': len(body)
+        }
+        try:
+            # Files change under the index lock so another process never evicts a blob being reused
+            with self._transaction() as connection:
+                blob_path = os.path.join(self.blobs_dir, blob)
+                if not os.path.exists(blob_path):
+                    self._write_atomic(blob_path, body)
+                self._write_atomic(os.path.join(self.entries_dir, f"{key}.json"),
+                                   json.dumps(entry).encode('utf-8'))
+                orphan = self._drop_from_index(connection, key)
+                self._index_entry(connection, key, blob, len(body), time.time())
+                if orphan and orphan != blob:
+                    self._remove(os.path.join(self.blobs_dir, orphan))
+                evicted = self._evict(connection)
+        except Exception as e:
+            logger.error(f"Failed to cache response for {url}: {e}")
+            return
+
+        with self.lock:
+            self.counters['stores'] += 1
+            self.counters['evictions'] += evicted
+
+    def refresh(self, entry: Dict, response_headers: Dict):
+        """Mark an entry as revalidated by a 304 response"""
+        entry['fetched_at'] = time.time()
+        for name in ('etag', 'last-modified'):
+            value = response_headers.get(name)
+            if value:
+                entry['headers'][name] = value
+        record = {k: v for k, v in entry.items() if k not in ('body', 'key')}
+        try:
+            with self._transaction() as connection:
+                # Skip entries another process evicted meanwhile rather than leave an unindexed file
+                if connection.execute("SELECT 1 FROM entries WHERE key = ?", (entry['key'],)).fetchone():
+                    self._write_atomic(os.path.join(self.entries_dir, f"{entry['key']}.json"),
+                                       json.dumps(record).encode('utf-8'))
+        except Exception as e:
+            logger.error(f"Failed to refresh cache entry for {entry['url']}: {e}")
+
+    def record(self, counter: str, entry: Optional[Dict] = None):
+        """Count a cache outcome; outcomes served from the cache also count bytes saved"""
+        with self.lock:
+            self.counters[counter] += 1
+            if entry is not None:
+                self.counters['bytes_saved'] += entry['size']
+
+    def stats(self) -> Dict:
+        """Outcome counters of this process; entries and size are shared by the whole directory"""
+        entries, size = self._connect().execute(
+            "SELECT (SELECT COUNT(*) FROM entries), (SELECT COALESCE(SUM(size), 0) FROM blobs)"
+        ).fetchone()
+        with self.lock:
+            lookups = self.counters['hits'] + self.counters['misses'] + \
+                self.counters['revalidated'] + self.counters['stale_served']
+            served = lookups - self.counters['misses']
+            return {
+                **self.counters,
+                'entries': entries,
+                'size_bytes': size,
+                'max_bytes': self.max_bytes,
+                'hit_ratio': round(served / lookups, 3) if lookups else 0.0
+            }
+
+    def _write_atomic(self, path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _remove(self, path: str):
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _index_entry(self, connection: sqlite3.Connection, key: str, blob: str, size: int, last_access: float):
+        connection.execute("INSERT INTO entries (key, blob, last_access) VALUES (?, ?, ?)", (key, blob, last_access))
+        connection.execute("INSERT INTO blobs (blob, size, refs) VALUES (?, ?, 1) "
+                           "ON CONFLICT (blob) DO UPDATE SET refs = refs + 1", (blob, size))
+
+    def _drop_from_index(self, connection: sqlite3.Connection, key: str) -> Optional[str]:
+        """Remove key from the index; return its blob if no entry uses it any more"""
+        row = connection.execute("SELECT blob FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+        connection.execute("UPDATE blobs SET refs = refs - 1 WHERE blob = ?", row)
+        return row[0] if connection.execute("DELETE FROM blobs WHERE blob = ? AND refs <= 0", row).rowcount else None
+
+    def _drop(self, connection: sqlite3.Connection, key: str) -> Optional[str]:
+        orphan = self._drop_from_index(connection, key)
+        self._remove(os.path.join(self.entries_dir, f"{key}.json"))
+        if orphan:
+            self._remove(os.path.join(self.blobs_dir, orphan))
+        return orphan
+
+    def _evict(self, connection: sqlite3.Connection) -> int:
+        """Drop least recently used entries until the cache fits max_bytes; returns how many"""
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        rows = connection.execute("SELECT entries.key, blobs.size FROM entries JOIN blobs USING (blob) "
+                                  "ORDER BY entries.last_access").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            if self._drop(connection, key):
+                total -= size
+            evicted += 1
+        return evicted
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,100 @@
+import logging
+import threading
+from typing import Dict, List, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class ResultWriter:
+    """Buffers result documents and writes them with insert_many.
+
+    A batch is written once it reaches batch_size documents, or after it has
+    waited flush_interval seconds, on a background thread so producers do not
+    wait on the database. Only when max_pending results are buffered (the
+    database is falling behind) does add() wait. close() writes whatever is left.
+    """
+
+    def __init__(self, result_model, job_id: str, result_type: str = 'general',
+                 batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 max_pending: Optional[int] = None):
+        self.result_model = result_model
+        self.job_id = job_id
+        self.result_type = result_type
+        self.batch_size = batch_size or Config.RESULT_BATCH_SIZE
+        self.flush_interval = Config.RESULT_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_pending = max(max_pending or Config.RESULT_MAX_PENDING, self.batch_size)
+        self.buffer: List[Dict] = []
+        self.written = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)  # wakes the flusher
+        self.space = threading.Condition(self.lock)  # wakes producers waiting for buffer space
+        self.write_lock = threading.Lock()
+        self.closed = False
+        self.flusher = threading.Thread(target=self._flush_loop, name=f'result-writer-{job_id}', daemon=True)
+        self.flusher.start()
+
+    def add(self, url: str, data: Dict):
+        """Queue one result for writing, waiting while max_pending results are already buffered"""
+        document = self.result_model.build_result(self.job_id, url, data, self.result_type)
+        with self.condition:
+            while len(self.buffer) >= self.max_pending and not self.closed:
+                self.condition.notify()
+                self.space.wait()
+            if self.closed:
+                raise RuntimeError("Result writer is closed")
+            self.buffer.append(document)
+            if len(self.buffer) >= self.batch_size:
+                self.condition.notify()
+
+    def _flush_loop(self):
+        while True:
+            with self.condition:
+                timed_out = False
+                if not self.closed and len(self.buffer) < self.batch_size:
+                    timed_out = not self.condition.wait(self.flush_interval)
+                if self.closed:
+                    return
+            # A full batch goes out on its own; the timer also writes the partial tail
+            self.flush(full_batches_only=not timed_out)
+
+    def flush(self, full_batches_only: bool = False):
+        """Write buffered results; full_batches_only leaves a partial batch buffered"""
+        with self.write_lock:
+            while True:
+                with self.condition:
+                    if full_batches_only and len(self.buffer) < self.batch_size:
+                        return
+                    batch = self.buffer[:self.batch_size]
+                    del self.buffer[:self.batch_size]
+                    self.space.notify_all()
+                if not batch:
+                    return
+                self._write(batch)
+
+    def _write(self, batch: List[Dict]):
+        try:
+            self.result_model.save_results(batch)
+            self.written += len(batch)
+        except Exception as e:
+            # Unordered bulk writes keep going past bad documents; count what did not land
+            details = getattr(e, 'details', None) or {}
+            inserted = details.get('nInserted', 0)
+            self.written += inserted
+            self.failed += len(batch) - inserted
+            logger.error(f"Error saving {len(batch) - inserted} results for job {self.job_id}: {e}")
+
+    def close(self):
+        """Stop the background flush and write the remaining results"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+            self.space.notify_all()
+        self.flusher.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request, Response, current_app
 from models import ScrapingJob, ScrapingResult, Analytics, DomainAdapter
-from typing import Dict
+from typing import Dict, Optional
+from config import Config
 import csv
 import io
 import json
@@ -17,10 +18,11 @@ def start_job_scraping():
         search_query = data.get('search_query', 'python developer')
         location = data.get('location', 'remote')
         max_results = data.get('max_results', 10)
+        priority = _requested_priority(data)
+        if priority is None:
+            return _invalid_priority()
         
-        # Import here to avoid circular imports
-        from real_time_scraper import RealTimeScraper
-        scraper = RealTimeScraper(current_app.db)
+        scraper = current_app.services.real_time_scraper
         
         job_data = {
             'search_query': search_query,
@@ -30,13 +32,13 @@ def start_job_scraping():
             'total_urls': max_results
         }
         
-        job_id = scraper.start_real_time_job_scraping(job_data)
+        job_id = scraper.start_real_time_job_scraping(job_data, priority)
         
         return jsonify({
             'success': True,
             'job_id': job_id,
-            'message': f'Job scraping started for "{search_query}" in {location}',
-            'status': 'running'
+            'message': f'Job scraping queued for "{search_query}" in {location}',
+            'status': 'pending'
         })
         
     except Exception as e:
@@ -54,9 +56,11 @@ def start_lead_scraping():
         
         if not target_domain:
             return jsonify({'success': False, 'error': 'target_domain is required'}), 400
+        priority = _requested_priority(data)
+        if priority is None:
+            return _invalid_priority()
         
-        from real_time_scraper import RealTimeScraper
-        scraper = RealTimeScraper(current_app.db)
+        scraper = current_app.services.real_time_scraper
         
         job_data = {
             'target_domain': target_domain,
@@ -66,13 +70,13 @@ def start_lead_scraping():
             'total_urls': max_results
         }
         
-        job_id = scraper.start_real_time_lead_scraping(job_data)
+        job_id = scraper.start_real_time_lead_scraping(job_data, priority)
         
         return jsonify({
             'success': True,
             'job_id': job_id,
-            'message': f'Lead generation started for {target_domain}',
-            'status': 'running'
+            'message': f'Lead generation queued for {target_domain}',
+            'status': 'pending'
         })
         
     except Exception as e:
@@ -96,6 +100,35 @@ def get_dashboard_analytics():
         logging.error(f"Analytics failed: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@api_bp.route('/cache/stats')
+def get_cache_stats():
+    """Get response cache hit/miss counters"""
+    from response_cache import get_response_cache
+    return jsonify(get_response_cache().stats())
+
+@api_bp.route('/admin/resources')
+def get_resource_usage():
+    """Get utilisation of the global limits shared by every job in this process"""
+    try:
+        from governor import get_governor
+        from browser_pool import get_browser_pool
+        from extraction_pool import get_extraction_pool
+        from cancellation import running_jobs
+        from pipeline import active_pipelines
+
+        services = current_app.services
+        return jsonify({
+            'governor': get_governor().stats(),
+            'browser_pool': get_browser_pool().stats(),
+            'extraction_pool': get_extraction_pool().stats(),
+            'job_queue': services.job_queue.stats(),
+            'running_jobs': running_jobs(),
+            'pipelines': active_pipelines()
+        })
+    except Exception as e:
+        logging.error(f"Resource usage failed: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @api_bp.route('/job/<job_id>/status')
 def get_job_status(job_id):
     """Get job status via API"""
@@ -249,38 +282,36 @@ def search_urls():
 def create_job():
     """Create a new real-time scraping job"""
     try:
-        from real_time_scraper import RealTimeScraper
-        
         data = request.json
         task_type = data.get('task_type', 'general')
+        priority = _requested_priority(data)
+        if priority is None:
+            return _invalid_priority()
         
         job_data = {
             'task_type': task_type,
             'adapter_name': data.get('adapter_name', 'default'),
             'search_query': data.get('query'),
             'urls': data.get('urls', []),
-            'max_results': data.get('max_results', 50)
+            'max_results': data.get('max_results', 50),
+            'cache': data.get('cache'),
+            'extraction_tier': data.get('extraction_tier'),
+            'priority': priority
         }
         
         if current_app.db:
             # Start real-time scraping
-            rt_scraper = RealTimeScraper(current_app.db)
+            rt_scraper = current_app.services.real_time_scraper
             
             if task_type == 'job_scraping':
-                job_id = rt_scraper.start_real_time_job_scraping(job_data)
+                job_id = rt_scraper.start_real_time_job_scraping(job_data, priority)
             elif task_type == 'lead_generation':
-                job_id = rt_scraper.start_real_time_lead_scraping(job_data)
+                job_id = rt_scraper.start_real_time_lead_scraping(job_data, priority)
             else:
-                # Generic scraping
+                # Generic scraping, run by a job worker
                 scraping_job = ScrapingJob(current_app.db)
                 job_id = scraping_job.create_job({**job_data, 'status': 'pending'})
-                
-                # Start generic scraping in background
-                import threading
-                threading.Thread(
-                    target=_run_generic_scraping,
-                    args=(job_id, job_data, current_app.db)
-                ).start()
+                current_app.services.job_queue.enqueue(job_id, 'generic', job_data, priority)
         else:
             # Fallback mock
             import uuid
@@ -324,16 +355,19 @@ def get_stats():
         logging.error(f"Stats fetch failed: {e}")
         return jsonify({'error': str(e)}), 500
     
-def _run_generic_scraping(job_id: str, job_data: Dict, db):
-    """Run generic scraping in background thread"""
-    from scraper_engine import ScraperEngine, BatchScraper
+def _run_generic_scraping(job_id: str, job_data: Dict, db, services, cancel_token):
+    """Run generic scraping (called by a job worker)"""
+    from response_cache import with_cache_policy
+    from result_writer import ResultWriter
+    from progress_reporter import ProgressReporter
+    from pipeline import PipelineStats
     
     try:
         scraping_job_model = ScrapingJob(db)
         scraping_result_model = ScrapingResult(db)
         
-        scraper = ScraperEngine()
-        batch_scraper = BatchScraper(scraper)
+        scraper = services.scraper_engine
+        batch_scraper = services.batch_scraper
         
         # Update job status
         scraping_job_model.update_job(job_id, {'status': 'running'})
@@ -350,30 +384,41 @@ def _run_generic_scraping(job_id: str, job_data: Dict, db):
         if urls:
             # Load adapter config
             adapter_name = job_data.get('adapter_name', 'default')
-            adapter_config = _load_adapter_config(adapter_name)
+            adapter_config = with_cache_policy(_load_adapter_config(adapter_name), job_data.get('cache'))
+            if job_data.get('extraction_tier'):
+                adapter_config['extraction_tier'] = job_data['extraction_tier']
             
-            # Progress callback
-            def progress_callback(progress, completed, results_count):
-                scraping_job_model.update_job(job_id, {
-                    'progress': int(progress),
-                    'completed_urls': completed,
-                    'results_count': results_count
-                })
+            # Progress counters, written out at most every PROGRESS_FLUSH_INTERVAL
+            progress = ProgressReporter(scraping_job_model, job_id)
             
-            # Scrape URLs
-            results = batch_scraper.scrape_urls(urls, adapter_config, progress_callback)
+            # Resume: skip URLs saved by an earlier run of this job
+            saved_urls = scraping_result_model.saved_urls(job_id)
+            remaining = [url for url in urls if url not in saved_urls]
+            resumed = len(urls) - len(remaining)
+            if resumed:
+                progress.resume(resumed, len(urls))
             
-            # Save results
-            for result in results:
+            # Scrape URLs, streaming successful results into the writer
+            def save_result(result):
                 if 'error' not in result:
-                    scraping_result_model.save_result(job_id, result.get('url', ''), result, 'general')
+                    writer.add(result.get('url', ''), result)
             
-            # Mark as completed
-            scraping_job_model.update_job(job_id, {
-                'status': 'completed',
-                'progress': 100,
-                'results_count': len([r for r in results if 'error' not in r])
-            })
+            pipeline_stats = PipelineStats(job_id, adapter_name)
+            with ResultWriter(scraping_result_model, job_id, 'general') as writer:
+                batch_scraper.scrape_urls(remaining, adapter_config, progress.update,
+                                          result_callback=save_result, cancel_token=cancel_token,
+                                          pipeline_stats=pipeline_stats)
+            
+            # Mark as completed; a cancelled job keeps the results saved so far. After a lost
+            # lease another worker runs the job and owns its status; only our results were saved
+            if cancel_token.lease_lost:
+                logging.info(f"Generic scraping {job_id} lost its lease")
+            elif cancel_token.cancelled:
+                progress.flush(status='cancelled', results_count=resumed + writer.written,
+                               pipeline=pipeline_stats.snapshot())
+            else:
+                progress.flush(status='completed', progress=100, results_count=resumed + writer.written,
+                               pipeline=pipeline_stats.snapshot())
         else:
             scraping_job_model.update_job(job_id, {
                 'status': 'failed',
@@ -382,11 +427,21 @@ def _run_generic_scraping(job_id: str, job_data: Dict, db):
             
     except Exception as e:
         logging.error(f"Generic scraping failed: {e}")
+        if cancel_token.lease_lost:
+            return
         scraping_job_model.update_job(job_id, {
             'status': 'failed',
             'error_message': str(e)
         })
 
+def _requested_priority(data: Dict) -> Optional[str]:
+    """Job priority from a request body; None if it is not one of JOB_PRIORITIES"""
+    priority = data.get('priority') or Config.DEFAULT_JOB_PRIORITY
+    return priority if priority in Config.JOB_PRIORITIES else None
+
+def _invalid_priority():
+    return jsonify({'success': False, 'error': f"priority must be one of {', '.join(Config.JOB_PRIORITIES)}"}), 400
+
 def _load_adapter_config(adapter_name: str) -> Dict:
     """Load adapter configuration"""
     adapter_configs = {
@@ -417,6 +472,20 @@ def _load_adapter_config(adapter_name: str) -> Dict:
     
     return adapter_configs.get(adapter_name, adapter_configs['default'])
 
+@api_bp.route('/job/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """Re-run a failed, cancelled or interrupted job, skipping URLs already saved"""
+    if not current_app.db:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        if not current_app.services.task_manager.resume_task(job_id):
+            return jsonify({'error': 'Job is not queued or is still running'}), 409
+        return jsonify({'message': 'Job resumed'})
+    except Exception as e:
+        logging.error(f"Job resume failed: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/job/<job_id>/cancel', methods=['POST'])
 def cancel_job(job_id):
     """Cancel a running job"""
@@ -424,6 +493,12 @@ def cancel_job(job_id):
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
+        from cancellation import cancel_job as cancel_running_job
+        
+        # Drops a queued job; a worker running it stops right away if it is in this
+        # process, otherwise at its next heartbeat
+        current_app.services.job_queue.cancel(job_id)
+        cancel_running_job(job_id)
         scraping_job = ScrapingJob(current_app.db)
         scraping_job.update_job(job_id, {'status': 'cancelled'})
         return jsonify({'message': 'Job cancellation requested'})
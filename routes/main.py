@@ -1,7 +1,5 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from models import ScrapingJob, ScrapingResult, Analytics
-from tasks import TaskManager
-from adapters import AdapterManager
 
 main_bp = Blueprint('main', __name__)
 
@@ -57,8 +55,7 @@ def new_job():
         flash('Database connection failed', 'error')
         return redirect(url_for('main.index'))
     
-    adapter_manager = AdapterManager()
-    adapters = adapter_manager.list_adapters()
+    adapters = app.services.adapter_manager.list_adapters()
     
     if request.method == 'POST':
         job_type = request.form.get('job_type', 'scrape')
@@ -81,7 +78,7 @@ def new_job():
             })
             
             # Start search task
-            task_manager = TaskManager(db)
+            task_manager = app.services.task_manager
             task_manager.start_search_task(job_id, query, max_results)
             
             flash('Search job started successfully', 'success')
@@ -114,7 +111,7 @@ def new_job():
             })
             
             # Start scraping task
-            task_manager = TaskManager(db)
+            task_manager = app.services.task_manager
             task_manager.start_scraping_task(job_id, urls, adapter_name, task_type)
             
             flash('Scraping job started successfully', 'success')
@@ -125,13 +122,13 @@ def new_job():
 @main_bp.route('/job/<job_id>/status')
 def job_status(job_id):
     """Job status page with real-time updates"""
-    from app import db
+    from app import db, app
     
     if not db:
         flash('Database connection failed', 'error')
         return redirect(url_for('main.dashboard'))
     
-    task_manager = TaskManager(db)
+    task_manager = app.services.task_manager
     job = task_manager.get_task_status(job_id)
     
     if not job:
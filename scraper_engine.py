@@ -1,21 +1,56 @@
+import asyncio
 import requests
 import time
 import random
+import threading
 import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
-from lxml import html
-from playwright.sync_api import sync_playwright
-from tenacity import retry, stop_after_attempt, wait_exponential
-from duckduckgo_search import DDGS
 from config import Config
-import trafilatura
+from async_fetcher import AsyncFetcher
+from browser_pool import get_browser_pool
+from host_scheduler import HostScheduler, get_host, resolve_host_policy
+from response_cache import get_response_cache, resolve_cache_policy
+from parsed_page import ParsedPage
+from selector_plan import SelectorPlan, compile_adapter, compile_field
+from extraction_pool import get_extraction_pool
+from cancellation import CancellationToken, JobCancelled
+from governor import get_governor
+from pipeline import PipelineStats, track, untrack
 
 logger = logging.getLogger(__name__)
 
+def retry_with_backoff(func):
+    """tenacity's @retry (3 attempts, exponential backoff), importing tenacity on first call"""
+    retrying = None
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal retrying
+        if retrying is None:
+            from tenacity import retry, stop_after_attempt, wait_exponential
+            retrying = retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))(func)
+        return retrying(*args, **kwargs)
+    return wrapper
+
 class ScraperEngine:
+    USER_AGENTS = [
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    ]
+    
     def __init__(self):
         self.session = requests.Session()
+        self.last_request_at = {}
+        self.rate_limit_lock = threading.Lock()
+        self.revalidating = set()
+        self.revalidator = ThreadPoolExecutor(max_workers=Config.CACHE_REVALIDATE_WORKERS,
+                                              thread_name_prefix='revalidate')
         self.setup_session()
         
     def setup_session(self):
@@ -31,85 +66,160 @@ class ScraperEngine:
         
     def rotate_user_agent(self):
         """Rotate user agent to avoid detection"""
-        user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        ]
-        self.session.headers['User-Agent'] = random.choice(user_agents)
-    
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def fetch_static(self, url: str) -> Optional[str]:
-        """Fetch page content using requests (static scraping)"""
+        self.session.headers['User-Agent'] = random.choice(self.USER_AGENTS)
+    
+    def fetch_static(self, url: str, adapter_config: Optional[Dict] = None) -> Optional[str]:
+        """Fetch page content using requests (static scraping), via the response cache"""
+        page = self.fetch_static_page(url, adapter_config)
+        return page.text if page else None
+    
+    @retry_with_backoff
+    def fetch_static_page(self, url: str, adapter_config: Optional[Dict] = None) -> Optional[ParsedPage]:
+        """Fetch a page statically, keeping its raw bytes for every later extraction stage"""
         try:
-            self.rotate_user_agent()
-            response = self.session.get(url, timeout=Config.REQUEST_TIMEOUT)
-            response.raise_for_status()
-            return response.text
+            policy = resolve_cache_policy(adapter_config)
+            if policy['bypass']:
+                return self._fetch_and_cache(url, store=False)[0]
+            
+            page, entry = self._from_cache(url, policy, adapter_config)
+            if page:
+                return page
+            
+            page, not_modified = self._fetch_and_cache(url, entry)
+            get_response_cache().record('revalidated' if not_modified else 'misses',
+                                        entry if not_modified else None)
+            return page
         except Exception as e:
             logger.error(f"Static scraping failed for {url}: {e}")
             return None
     
-    def fetch_dynamic(self, url: str, wait_time: int = 3) -> Optional[str]:
-        """Fetch page content using Playwright (dynamic scraping)"""
+    def from_cache(self, url: str, adapter_config: Optional[Dict] = None) -> Optional[ParsedPage]:
+        """Serve a fresh (or stale, revalidating) cached page; None means it needs a network fetch"""
+        try:
+            policy = resolve_cache_policy(adapter_config)
+            if policy['bypass']:
+                return None
+            return self._from_cache(url, policy, adapter_config)[0]
+        except Exception as e:
+            logger.error(f"Cache lookup failed for {url}: {e}")
+            return None
+    
+    def _from_cache(self, url: str, policy: Dict,
+                    adapter_config: Optional[Dict] = None) -> Tuple[Optional[ParsedPage], Optional[Dict]]:
+        """Return (page, None) for a servable entry, else (None, entry to revalidate or None)"""
+        cache = get_response_cache()
+        entry = cache.lookup(url, self.session.headers)
+        if entry:
+            state = cache.freshness(entry, policy)
+            if state == 'fresh':
+                cache.record('hits', entry)
+                return ParsedPage(url, raw=entry['body'], encoding=entry['encoding']), None
+            if state == 'stale':
+                cache.record('stale_served', entry)
+                self.revalidate_in_background(url, entry, adapter_config)
+                return ParsedPage(url, raw=entry['body'], encoding=entry['encoding']), None
+        return None, entry
+    
+    def _fetch_and_cache(self, url: str, entry: Optional[Dict] = None,
+                         store: bool = True) -> Tuple[ParsedPage, bool]:
+        """GET a URL, conditionally if a cache entry exists; return (page, not_modified)"""
+        cache = get_response_cache()
+        self.rotate_user_agent()
+        headers = cache.conditional_headers(entry) if entry else {}
+        with get_governor().http_slot():
+            response = self.session.get(url, headers=headers, timeout=Config.REQUEST_TIMEOUT)
+        
+        if entry and response.status_code == 304:
+            cache.refresh(entry, response.headers)
+            return ParsedPage(url, raw=entry['body'], encoding=entry['encoding']), True
+        
+        response.raise_for_status()
+        encoding = response.encoding or response.apparent_encoding
+        if store:
+            cache.store(url, self.session.headers, response.headers, response.content, encoding)
+        return ParsedPage(url, raw=response.content, encoding=encoding), False
+    
+    def revalidate_in_background(self, url: str, entry: Dict, adapter_config: Optional[Dict] = None):
+        """Refresh a stale cache entry without making the caller wait, as politely as any fetch"""
+        with self.rate_limit_lock:
+            if entry['key'] in self.revalidating or len(self.revalidating) >= Config.CACHE_MAX_REVALIDATIONS:
+                return  # a later stale hit tries again
+            self.revalidating.add(entry['key'])
+        
+        def revalidate():
+            try:
+                self.rate_limit(url, adapter_config)
+                self._fetch_and_cache(url, entry)
+            except Exception as e:
+                logger.warning(f"Background revalidation failed for {url}: {e}")
+            finally:
+                with self.rate_limit_lock:
+                    self.revalidating.discard(entry['key'])
+        
+        self.revalidator.submit(revalidate)
+    
+    def fetch_dynamic(self, url: str, adapter_config: Optional[Dict] = None,
+                      wait_time: float = 0, cancel_token: Optional[CancellationToken] = None) -> Optional[str]:
+        """Fetch page content using the shared Playwright browser pool (dynamic scraping)"""
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                page.goto(url, wait_until='networkidle')
-                time.sleep(wait_time)  # Wait for dynamic content
-                content = page.content()
-                browser.close()
-                return content
+            return get_browser_pool().render(url, adapter_config, wait_time, cancel_token)
         except Exception as e:
             logger.error(f"Dynamic scraping failed for {url}: {e}")
             return None
     
-    def extract_text_content(self, url: str) -> Optional[str]:
-        """Extract clean text content using trafilatura"""
+    def fetch_page(self, url: str, adapter_config: Dict, use_dynamic: bool = False,
+                   cancel_token: Optional[CancellationToken] = None) -> Optional[ParsedPage]:
+        """Fetch a URL once, falling back to dynamic rendering if the adapter allows it"""
+        if use_dynamic:
+            content = self.fetch_dynamic(url, adapter_config, cancel_token=cancel_token)
+            return ParsedPage(url, text=content) if content else None
+        
+        page = self.fetch_static_page(url, adapter_config)
+        if not page and adapter_config.get('fallback_to_dynamic', True):
+            logger.info(f"Falling back to dynamic scraping for {url}")
+            content = self.fetch_dynamic(url, adapter_config, cancel_token=cancel_token)
+            page = ParsedPage(url, text=content) if content else None
+        return page
+    
+    def extract_text_content(self, page) -> Optional[str]:
+        """Extract clean text content using trafilatura from a fetched page (or a URL)"""
         try:
-            downloaded = trafilatura.fetch_url(url)
+            import trafilatura
+            if isinstance(page, ParsedPage):
+                downloaded = page.text
+            else:
+                downloaded = trafilatura.fetch_url(page)
             text = trafilatura.extract(downloaded)
             return text
         except Exception as e:
-            logger.error(f"Text extraction failed for {url}: {e}")
+            logger.error(f"Text extraction failed for {getattr(page, 'url', page)}: {e}")
             return None
     
     def scrape_with_adapter(self, url: str, adapter_config: Dict, use_dynamic: bool = False) -> Dict:
         """Scrape URL using adapter configuration"""
-        # Fetch content
-        if use_dynamic:
-            content = self.fetch_dynamic(url)
-        else:
-            content = self.fetch_static(url)
-            if not content and adapter_config.get('fallback_to_dynamic', True):
-                logger.info(f"Falling back to dynamic scraping for {url}")
-                content = self.fetch_dynamic(url)
-        
-        if not content:
+        page = self.fetch_page(url, adapter_config, use_dynamic)
+        return self.extract_with_adapter(url, page, adapter_config)
+    
+    def extract_with_adapter(self, url: str, page: Optional[ParsedPage], adapter_config: Dict,
+                             plan: Optional[SelectorPlan] = None) -> Dict:
+        """Extract adapter fields from an already fetched page"""
+        if not page:
             return {'error': 'Failed to fetch content'}
         
         # Parse content
         try:
-            tree = html.fromstring(content)
-            result = {'url': url, 'scraped_data': {}}
-            
-            # Extract data using selectors
-            selectors = adapter_config.get('selectors', {})
-            for field, selector_config in selectors.items():
-                extracted_value = self.extract_field(tree, selector_config)
-                if extracted_value:
-                    result['scraped_data'][field] = extracted_value
+            # Extract data using the adapter's compiled selectors
+            plan = plan or compile_adapter(adapter_config)
+            result = {'url': url, 'scraped_data': plan.extract(page.tree)}
             
             # Extract links if specified
             if adapter_config.get('extract_links', False):
-                links = self.extract_links(tree, url)
+                links = self.extract_links(page, url)
                 result['scraped_data']['links'] = links
             
             # Extract text content if specified
             if adapter_config.get('extract_text', False):
-                text_content = self.extract_text_content(url)
+                text_content = self.extract_text_content(page)
                 if text_content:
                     result['scraped_data']['text_content'] = text_content
             
@@ -120,49 +230,16 @@ class ScraperEngine:
             return {'error': f'Parsing failed: {str(e)}'}
     
     def extract_field(self, tree, selector_config) -> Optional[str]:
-        """Extract field using selector configuration"""
-        try:
-            selector = selector_config.get('selector')
-            attribute = selector_config.get('attribute', 'text')
-            multiple = selector_config.get('multiple', False)
-            
-            if not selector:
-                return None
-            
-            # Use CSS or XPath selector
-            if selector.startswith('//') or selector.startswith('.//'):
-                elements = tree.xpath(selector)
-            else:
-                elements = tree.cssselect(selector)
-            
-            if not elements:
-                return None
-            
-            # Extract value(s)
-            values = []
-            for element in elements:
-                if attribute == 'text':
-                    value = element.text_content().strip()
-                else:
-                    value = element.get(attribute, '').strip()
-                
-                if value:
-                    values.append(value)
-            
-            if not values:
-                return None
-            
-            if multiple:
-                return values
-            else:
-                return values[0] if values else None
-            
-        except Exception as e:
-            logger.error(f"Error extracting field: {e}")
-            return None
+        """Extract field using selector configuration from a ParsedPage or lxml tree"""
+        if isinstance(tree, ParsedPage):
+            tree = tree.tree
+        return compile_field(selector_config).extract(tree)
     
     def extract_links(self, tree, base_url: str) -> List[str]:
         """Extract all links from the page"""
+        if isinstance(tree, ParsedPage):
+            return list(tree.links)
+        
         links = []
         try:
             link_elements = tree.cssselect('a[href]')
@@ -179,6 +256,7 @@ class ScraperEngine:
     def search_duckduckgo(self, query: str, max_results: int = 20) -> List[Dict]:
         """Search DuckDuckGo for URLs"""
         try:
+            from duckduckgo_search import DDGS
             ddgs = DDGS()
             results = []
             
@@ -195,39 +273,285 @@ class ScraperEngine:
             logger.error(f"DuckDuckGo search failed: {e}")
             return []
     
-    def rate_limit(self):
-        """Apply rate limiting between requests"""
-        time.sleep(Config.RATE_LIMIT_DELAY + random.uniform(0, 1))
+    def rate_limit(self, url: Optional[str] = None, adapter_config: Optional[Dict] = None):
+        """Apply rate limiting between requests to the same host"""
+        if url is None:
+            time.sleep(Config.RATE_LIMIT_DELAY + random.uniform(0, 1))
+            return
+        
+        host = get_host(url)
+        policy = resolve_host_policy(adapter_config, host)
+        with self.rate_limit_lock:
+            now = time.monotonic()
+            last = self.last_request_at.get(host)
+            delay = 0
+            if last is not None:
+                spacing = policy['min_delay'] + random.uniform(0, policy['jitter'])
+                delay = max(0, last + spacing - now)
+            self.last_request_at[host] = now + delay
+        
+        if delay:
+            time.sleep(delay)
 
 class BatchScraper:
-    def __init__(self, scraper_engine: ScraperEngine):
+    def __init__(self, scraper_engine: ScraperEngine, mode: Optional[str] = None,
+                 max_in_flight: Optional[int] = None, contact_extractor=None,
+                 extraction_pool=None):
         self.scraper = scraper_engine
+        self.mode = mode or Config.BATCH_FETCH_MODE
+        self.max_in_flight = max_in_flight or Config.MAX_IN_FLIGHT_REQUESTS
+        self.contact_extractor = contact_extractor
+        # False extracts inline, page by page (the pool's own workers use this)
+        if extraction_pool is None:
+            extraction_pool = get_extraction_pool()
+        self.extraction_pool = extraction_pool or None
         
     def scrape_urls(self, urls: List[str], adapter_config: Dict, 
-                   progress_callback=None) -> List[Dict]:
-        """Scrape multiple URLs with progress tracking"""
+                   progress_callback=None, task_type: str = 'general',
+                   result_callback=None, cancel_token: Optional[CancellationToken] = None,
+                   pipeline_stats: Optional[PipelineStats] = None) -> List[Dict]:
+        """Scrape multiple URLs with progress tracking.
+        
+        With a result_callback each result is handed over as soon as it is
+        ready instead of being collected, and an empty list is returned.
+        Cancelling cancel_token drops the URLs not yet started. In async mode
+        pipeline_stats collects per-stage queue depth and throughput.
+        """
+        if self.mode == 'async':
+            return asyncio.run(self.scrape_urls_async(urls, adapter_config, progress_callback,
+                                                      task_type, result_callback, cancel_token,
+                                                      pipeline_stats))
+        
         results = []
+        successful = 0
         total_urls = len(urls)
+        plan = compile_adapter(adapter_config)
         
         for i, url in enumerate(urls):
+            if cancel_token and cancel_token.cancelled:
+                logger.info(f"Scraping cancelled, dropping {total_urls - i} queued URLs")
+                break
             try:
                 logger.info(f"Scraping {i+1}/{total_urls}: {url}")
                 
-                # Apply rate limiting
-                if i > 0:
-                    self.scraper.rate_limit()
-                
-                # Scrape URL
-                result = self.scraper.scrape_with_adapter(url, adapter_config)
-                results.append(result)
-                
-                # Update progress
-                if progress_callback:
-                    progress = ((i + 1) / total_urls) * 100
-                    progress_callback(progress, i + 1, len([r for r in results if 'error' not in r]))
-                
+                # Cached pages never touch the host, so only network fetches wait for its rate limit
+                page = self.scraper.from_cache(url, adapter_config)
+                if page is None:
+                    self.scraper.rate_limit(url, adapter_config)
+                    page = self.scraper.fetch_page(url, adapter_config, cancel_token=cancel_token)
+                result = self.extract_page(url, page, adapter_config, task_type, plan)
             except Exception as e:
                 logger.error(f"Error scraping {url}: {e}")
-                results.append({'url': url, 'error': str(e)})
+                result = {'url': url, 'error': str(e)}
+            
+            if result_callback:
+                result_callback(result)
+            else:
+                results.append(result)
+            
+            # Update progress
+            if 'error' not in result:
+                successful += 1
+            if progress_callback:
+                progress = ((i + 1) / total_urls) * 100
+                progress_callback(progress, i + 1, successful)
+        
+        return results
+    
+    async def scrape_urls_async(self, urls: List[str], adapter_config: Dict,
+                                progress_callback=None, task_type: str = 'general',
+                                result_callback=None,
+                                cancel_token: Optional[CancellationToken] = None,
+                                pipeline_stats: Optional[PipelineStats] = None) -> List[Dict]:
+        """Scrape multiple URLs through fetch -> extract -> persist stages.
+        
+        Stages are joined by bounded queues and each has its own concurrency:
+        max_in_flight fetches, PIPELINE_EXTRACT_WORKERS extractions and one
+        persister that runs the callbacks off the loop. A stage that falls
+        behind fills its input queue, which makes the stage before it wait, so
+        memory stays bounded whichever stage is the bottleneck.
+        """
+        total_urls = len(urls)
+        if not total_urls:
+            return []
+        results = [] if result_callback else [None] * total_urls
+        counters = {'completed': 0, 'successful': 0}
+        plan = compile_adapter(adapter_config)
+        stats = pipeline_stats or PipelineStats(adapter_name=adapter_config.get('name'))
+        
+        # Interleave hosts so the global window stays full while each host sees polite traffic.
+        # Only cache misses are scheduled: cached pages skip the per-host politeness wait
+        scheduler = HostScheduler(adapter_config)
+        scheduler.open()
+        fetched = asyncio.Queue(Config.PIPELINE_QUEUE_SIZE)
+        extracted = asyncio.Queue(Config.PIPELINE_QUEUE_SIZE)
+        fetch_stage = stats.stage('fetch', min(self.max_in_flight, total_urls), scheduler.pending)
+        extract_stage = stats.stage('extract', min(Config.PIPELINE_EXTRACT_WORKERS, total_urls),
+                                    fetched.qsize, fetched.maxsize)
+        persist_stage = stats.stage('persist', 1, extracted.qsize, extracted.maxsize)
+        state = {'stopping': False, 'error': None}
+        
+        def hand_over(result: Dict, completed: int, successful: int):
+            # May block (a full result writer); runs on a thread so only this stage waits
+            if result_callback:
+                result_callback(result)
+            if progress_callback:
+                progress_callback((completed / total_urls) * 100, completed, successful)
+        
+        async with AsyncFetcher(self.scraper.session.headers, ScraperEngine.USER_AGENTS,
+                                self.max_in_flight, scheduler) as fetcher:
+            async def lookup():
+                try:
+                    for i, url in enumerate(urls):
+                        page = fetcher.from_cache(url, adapter_config)
+                        if page is None:
+                            await scheduler.put(i, url)
+                            continue
+                        with fetch_stage.working():
+                            logger.info(f"Scraping {i+1}/{total_urls} from cache: {url}")
+                        await fetched.put((i, url, page))
+                finally:
+                    await scheduler.close()
+            
+            async def fetch():
+                while True:
+                    item = await scheduler.next()
+                    if item is None:
+                        break
+                    i, url = item
+                    with fetch_stage.working():
+                        logger.info(f"Scraping {i+1}/{total_urls}: {url}")
+                        try:
+                            page = await self._fetch_one_async(fetcher, scheduler, url, adapter_config)
+                            failure = None
+                        except Exception as e:
+                            logger.error(f"Error scraping {url}: {e}")
+                            failure = {'url': url, 'error': str(e)}
+                    # Waits here while the next stage is behind
+                    if failure:
+                        await extracted.put((i, failure))
+                    else:
+                        await fetched.put((i, url, page))
+            
+            async def extract():
+                while True:
+                    item = await fetched.get()
+                    if item is None:
+                        break
+                    i, url, page = item
+                    with extract_stage.working():
+                        try:
+                            result = await self._extract_one_async(url, page, adapter_config, task_type,
+                                                                   plan, cancel_token)
+                        except JobCancelled:
+                            break
+                        except Exception as e:
+                            logger.error(f"Error scraping {url}: {e}")
+                            result = {'url': url, 'error': str(e)}
+                    await extracted.put((i, result))
+            
+            async def persist():
+                while True:
+                    item = await extracted.get()
+                    if item is None:
+                        break
+                    if state['error']:
+                        continue  # keep draining so upstream stages never block on a dead stage
+                    i, result = item
+                    with persist_stage.working():
+                        counters['completed'] += 1
+                        if 'error' not in result:
+                            counters['successful'] += 1
+                        if not result_callback:
+                            results[i] = result
+                        try:
+                            if result_callback or progress_callback:
+                                await asyncio.to_thread(hand_over, result, counters['completed'],
+                                                        counters['successful'])
+                        except Exception as e:
+                            state['error'] = e
+                            stop()
+            
+            fetchers = [asyncio.ensure_future(lookup())]
+            fetchers += [asyncio.ensure_future(fetch()) for _ in range(fetch_stage.workers)]
+            extractors = [asyncio.ensure_future(extract()) for _ in range(extract_stage.workers)]
+            persister = asyncio.ensure_future(persist())
+            
+            def stop():
+                # Abort in-flight fetches, renders and extraction waits; already extracted results still persist
+                state['stopping'] = True
+                for task in fetchers + extractors + list(fetcher.revalidations.values()):
+                    task.cancel()
+            
+            def cancel():
+                logger.info(f"Scraping cancelled, dropping {scheduler.drop_pending()} queued URLs")
+                stop()
+            
+            def failed(task: asyncio.Future):
+                if not task.cancelled() and task.exception() is not None:
+                    state['error'] = state['error'] or task.exception()
+                    stop()
+            
+            for task in fetchers + extractors:
+                task.add_done_callback(failed)
+            remove_callback = lambda: None
+            if cancel_token:
+                loop = asyncio.get_running_loop()
+                remove_callback = cancel_token.add_callback(lambda: loop.call_soon_threadsafe(cancel))
+            track(stats)
+            try:
+                # Close each stage once the one before it has finished
+                await asyncio.gather(*fetchers, return_exceptions=True)
+                if not state['stopping']:
+                    for _ in extractors:
+                        await fetched.put(None)
+                await asyncio.gather(*extractors, return_exceptions=True)
+                await extracted.put(None)
+                await persister
+            finally:
+                remove_callback()
+                untrack(stats)
+            logger.info(stats.summary())
+            if state['error']:
+                raise state['error']
         
         return results
+    
+    def extract_page(self, url: str, page: Optional[ParsedPage], adapter_config: Dict,
+                     task_type: str = 'general', plan: Optional[SelectorPlan] = None) -> Dict:
+        """Run adapter extraction and, for lead/job tasks, contact extraction on one fetched page"""
+        result = self.scraper.extract_with_adapter(url, page, adapter_config, plan)
+        if 'error' not in result and task_type in ['lead', 'job'] and self.contact_extractor:
+            self.contact_extractor.enrich_scraped_data(page, result['scraped_data'], task_type,
+                                                       adapter_config.get('extraction_tier'))
+        return result
+    
+    async def _fetch_one_async(self, fetcher: AsyncFetcher, scheduler: HostScheduler,
+                               url: str, adapter_config: Dict) -> Optional[ParsedPage]:
+        """Fetch one URL on the event loop, rendering it if the static fetch fails"""
+        try:
+            page = await fetcher.fetch(url, adapter_config)
+            if not page and adapter_config.get('fallback_to_dynamic', True):
+                logger.info(f"Falling back to dynamic scraping for {url}")
+                content = await get_browser_pool().render_async(url, adapter_config)
+                page = ParsedPage(url, text=content) if content else None
+            return page
+        finally:
+            # The host slot covers network time only, not parsing
+            await scheduler.release(url)
+    
+    async def _extract_one_async(self, url: str, page: Optional[ParsedPage], adapter_config: Dict,
+                                 task_type: str, plan: SelectorPlan,
+                                 cancel_token: Optional[CancellationToken] = None) -> Dict:
+        """Parse and extract one fetched page off the event loop"""
+        if page and self.extraction_pool:
+            try:
+                # Blocks (off the loop) while the extraction pool is full, holding up this stage
+                future = await asyncio.to_thread(self.extraction_pool.submit, url, page,
+                                                 adapter_config, task_type, self, cancel_token)
+                return await asyncio.wrap_future(future)
+            except BrokenProcessPool as e:
+                logger.error(f"Extraction pool failed on {url}, extracting in-process: {e}")
+                self.extraction_pool.reset()
+        
+        return await asyncio.to_thread(self.extract_page, url, page, adapter_config, task_type, plan)
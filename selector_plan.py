@@ -0,0 +1,118 @@
+import re
+import json
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+logger = logging.getLogger(__name__)
+
+ATTRIBUTE_NAME = re.compile(r'^[A-Za-z_][\w.-]*$')
+
+class FieldPlan:
+    """One adapter field compiled to XPath, with its extraction strategy decided up front"""
+
+    def __init__(self, name: str, selector_config: Dict):
+        self.name = name
+        self.selector = selector_config.get('selector')
+        self.attribute = selector_config.get('attribute', 'text')
+        self.multiple = selector_config.get('multiple', False)
+        self.all = None
+        self.first = None
+
+        if not self.selector:
+            return
+        try:
+            if self.selector.startswith('//') or self.selector.startswith('.//'):
+                path = self.selector
+            else:
+                # Translate CSS the same way lxml's tree.cssselect() does, once
+                path = CSSSelector(self.selector, translator='html').path
+            self.all = etree.XPath(path)
+
+            # Non-multiple fields only need the first element with a non-blank value
+            if not self.multiple:
+                if self.attribute == 'text':
+                    predicate = "normalize-space(string(.)) != ''"
+                elif ATTRIBUTE_NAME.match(self.attribute):
+                    predicate = f"normalize-space(@{self.attribute}) != ''"
+                else:
+                    predicate = None
+                if predicate:
+                    self.first = etree.XPath(f"({path})[{predicate}][1]")
+        except Exception as e:
+            logger.warning(f"Selector for field '{name}' cannot be compiled ({self.selector}): {e}")
+            self.all = None
+            self.first = None
+
+    def value(self, item) -> str:
+        if isinstance(item, str):
+            return item.strip()
+        if self.attribute == 'text':
+            return item.text_content().strip()
+        return (item.get(self.attribute) or '').strip()
+
+    def extract(self, tree) -> Optional[Union[str, List[str]]]:
+        """Evaluate the field against a parsed tree"""
+        if self.all is None:
+            return None
+        try:
+            if self.first is not None:
+                for item in self.first(tree):
+                    value = self.value(item)
+                    if value:
+                        return value
+
+            values = [value for value in (self.value(item) for item in self.all(tree)) if value]
+        except Exception as e:
+            logger.error(f"Error extracting field '{self.name}': {e}")
+            return None
+
+        if not values:
+            return None
+        return values if self.multiple else values[0]
+
+class SelectorPlan:
+    """All of an adapter's selector fields, compiled once"""
+
+    def __init__(self, selectors: Dict):
+        self.fields = [FieldPlan(name, config) for name, config in selectors.items()]
+
+    def extract(self, tree) -> Dict:
+        """Return {field: value} for every field that matched"""
+        scraped_data = {}
+        for field in self.fields:
+            value = field.extract(tree)
+            if value:
+                scraped_data[field.name] = value
+        return scraped_data
+
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+MAX_CACHED_PLANS = 256
+
+def _cached(kind: str, config: Dict, build):
+    # Keyed by content, so an edited adapter file or DomainAdapter document compiles afresh
+    key = kind + hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    with _plans_lock:
+        if key in _plans:
+            _plans.move_to_end(key)
+            return _plans[key]
+    plan = build()
+    with _plans_lock:
+        _plans[key] = plan
+        if len(_plans) > MAX_CACHED_PLANS:
+            _plans.popitem(last=False)
+    return plan
+
+def compile_adapter(adapter_config: Dict) -> SelectorPlan:
+    """Return the compiled selector plan for an adapter configuration"""
+    selectors = adapter_config.get('selectors', {})
+    return _cached('adapter:', selectors, lambda: SelectorPlan(selectors))
+
+def compile_field(selector_config: Dict) -> FieldPlan:
+    """Return the compiled plan for a single selector configuration"""
+    return _cached('field:', selector_config, lambda: FieldPlan('field', selector_config))
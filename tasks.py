@@ -1,25 +1,56 @@
-import threading
 import logging
 from typing import Dict, List, Callable
 from datetime import datetime
 from scraper_engine import ScraperEngine, BatchScraper
 from contact_extractor import ContactExtractor
 from adapters import AdapterManager
+from response_cache import with_cache_policy
+from result_writer import ResultWriter
+from progress_reporter import ProgressReporter
+from cancellation import CancellationToken, cancel_job
+from job_queue import get_job_queue
+from pipeline import PipelineStats
 
 logger = logging.getLogger(__name__)
 
 class TaskManager:
-    def __init__(self, db):
+    def __init__(self, db, scraper_engine: ScraperEngine = None, contact_extractor: ContactExtractor = None,
+                 batch_scraper: BatchScraper = None, adapter_manager: AdapterManager = None,
+                 job_queue=None):
         self.db = db
-        self.running_tasks = {}
-        self.scraper_engine = ScraperEngine()
-        self.batch_scraper = BatchScraper(self.scraper_engine)
-        self.contact_extractor = ContactExtractor()
-        self.adapter_manager = AdapterManager()
+        self.running_tasks = {}  # jobs this process is running, by job_id
+        # Shared instances come from the service container; build our own otherwise
+        self.scraper_engine = scraper_engine or ScraperEngine()
+        self.contact_extractor = contact_extractor or ContactExtractor()
+        self.batch_scraper = batch_scraper or BatchScraper(self.scraper_engine,
+                                                           contact_extractor=self.contact_extractor)
+        self.adapter_manager = adapter_manager or AdapterManager()
+        self.job_queue = job_queue or get_job_queue(db)
+        
+        from models import ScrapingResult
+        ScrapingResult(db).ensure_indexes()
     
     def start_scraping_task(self, job_id: str, urls: List[str], adapter_name: str, 
-                           task_type: str = 'general') -> str:
-        """Start a scraping task in background thread"""
+                           task_type: str = 'general', cache_policy: Dict = None,
+                           extraction_tier: str = None, priority: str = None) -> str:
+        """Queue a scraping task for the job workers"""
+        from models import ScrapingJob
+        
+        ScrapingJob(self.db).update_job(job_id, {
+            'status': 'pending',
+            'total_urls': len(urls)
+        })
+        self.job_queue.enqueue(job_id, 'scrape', {
+            'urls': urls,
+            'adapter_name': adapter_name,
+            'task_type': task_type,
+            'cache_policy': cache_policy,
+            'extraction_tier': extraction_tier
+        }, priority)
+        return job_id
+    
+    def run_scraping_task(self, job_id: str, payload: Dict, cancel_token: CancellationToken):
+        """Run a queued scraping task (called by a job worker)"""
         from models import ScrapingJob, ScrapingResult
         
         job_model = ScrapingJob(self.db)
@@ -28,98 +59,120 @@ class TaskManager:
         # Update job status
         job_model.update_job(job_id, {
             'status': 'running',
-            'total_urls': len(urls),
+            'total_urls': len(payload['urls']),
             'started_at': datetime.utcnow()
         })
         
-        # Create progress callback
-        def progress_callback(progress: float, completed: int, successful: int):
-            job_model.update_job(job_id, {
-                'progress': progress,
-                'completed_urls': completed,
-                'results_count': successful
-            })
+        # Progress is counted in memory and written out at most every PROGRESS_FLUSH_INTERVAL
+        progress = ProgressReporter(job_model, job_id)
         
-        # Start scraping in background thread
-        thread = threading.Thread(
-            target=self._run_scraping_task,
-            args=(job_id, urls, adapter_name, task_type, job_model, result_model, progress_callback)
-        )
-        thread.daemon = True
-        thread.start()
+        self.running_tasks[job_id] = cancel_token
+        self._run_scraping_task(job_id, payload['urls'], payload['adapter_name'], payload.get('task_type', 'general'),
+                                job_model, result_model, progress, cancel_token, payload.get('cache_policy'),
+                                payload.get('extraction_tier'))
+    
+    def resume_task(self, job_id: str) -> bool:
+        """Queue a failed, cancelled or interrupted job again; it skips the URLs already saved"""
+        from models import ScrapingJob
         
-        self.running_tasks[job_id] = thread
-        return job_id
+        if not self.job_queue.requeue(job_id):
+            return False
+        ScrapingJob(self.db).update_job(job_id, {'status': 'pending', 'error_message': None})
+        return True
     
     def _run_scraping_task(self, job_id: str, urls: List[str], adapter_name: str, 
-                          task_type: str, job_model, result_model, progress_callback):
+                          task_type: str, job_model, result_model, progress: ProgressReporter,
+                          cancel_token: CancellationToken, cache_policy=None,
+                          extraction_tier=None):
         """Run the actual scraping task"""
         try:
-            # Load adapter configuration
+            # Load adapter configuration, applying any job-level cache policy and extraction tier
             adapter_config = self.adapter_manager.load_adapter(adapter_name)
+            adapter_config = with_cache_policy(adapter_config, cache_policy)
+            if extraction_tier:
+                adapter_config = {**adapter_config, 'extraction_tier': extraction_tier}
             
-            # Scrape URLs
-            results = self.batch_scraper.scrape_urls(urls, adapter_config, progress_callback)
+            # Resume: URLs with a saved result from an earlier run (a worker that died,
+            # a cancelled job) are skipped
+            saved_urls = result_model.saved_urls(job_id)
+            remaining = [url for url in urls if url not in saved_urls]
+            resumed = len(urls) - len(remaining)
+            if resumed:
+                logger.info(f"Resuming scraping task {job_id}: {resumed} of {len(urls)} URLs already saved")
+                progress.resume(resumed, len(urls))
             
-            # Process and save results
-            successful_results = 0
-            failed_results = 0
+            # Scrape URLs; lead/job contact extraction runs on the same fetched page.
+            # Results stream into the writer as they complete instead of piling up here
+            counts = {'failed': 0}
             
-            for result in results:
+            def save_result(result: Dict):
                 if 'error' not in result:
-                    # Extract contacts if it's a lead generation task
-                    if task_type in ['lead', 'job']:
-                        scraped_data = result.get('scraped_data', {})
-                        
-                        # Get HTML content for contact extraction
-                        url = result['url']
-                        html_content = self.scraper_engine.fetch_static(url)
-                        
-                        if html_content:
-                            if task_type == 'lead':
-                                contacts = self.contact_extractor.extract_from_html(html_content)
-                                lead_score = self.contact_extractor.score_lead_quality(contacts)
-                                scraped_data['contacts'] = contacts
-                                scraped_data['lead_score'] = lead_score
-                            elif task_type == 'job':
-                                job_details = self.contact_extractor.extract_job_details(html_content)
-                                scraped_data.update(job_details)
-                        
-                        result['scraped_data'] = scraped_data
-                    
-                    # Save result
-                    result_model.save_result(job_id, result['url'], result['scraped_data'], task_type)
-                    successful_results += 1
+                    writer.add(result['url'], result['scraped_data'])
                 else:
-                    failed_results += 1
+                    counts['failed'] += 1
                     logger.error(f"Failed to scrape {result.get('url', 'unknown')}: {result.get('error')}")
             
+            # Per-stage queue depth and throughput, kept on the job to spot the bottleneck stage
+            pipeline_stats = PipelineStats(job_id, adapter_name)
+            with ResultWriter(result_model, job_id, task_type) as writer:
+                self.batch_scraper.scrape_urls(remaining, adapter_config, progress.update, task_type,
+                                               result_callback=save_result, cancel_token=cancel_token,
+                                               pipeline_stats=pipeline_stats)
+            successful_results = resumed + writer.written
+            failed_results = counts['failed'] + writer.failed
+            
+            if cancel_token.lease_lost:
+                # Another worker runs the job now and reports its progress; our results are saved
+                logger.info(f"Scraping task {job_id} lost its lease after {successful_results} results")
+                return
+            
+            if cancel_token.cancelled:
+                # Keep the partial progress; the results scraped so far are already saved
+                progress.flush(
+                    status='cancelled',
+                    results_count=successful_results,
+                    failed_urls=failed_results,
+                    pipeline=pipeline_stats.snapshot(),
+                    completed_at=datetime.utcnow()
+                )
+                logger.info(f"Scraping task {job_id} cancelled after {successful_results} results")
+                return
+            
             # Update job completion
-            job_model.update_job(job_id, {
-                'status': 'completed',
-                'progress': 100,
-                'completed_urls': len(urls),
-                'results_count': successful_results,
-                'failed_urls': failed_results,
-                'completed_at': datetime.utcnow()
-            })
+            progress.flush(
+                status='completed',
+                progress=100,
+                completed_urls=len(urls),
+                results_count=successful_results,
+                failed_urls=failed_results,
+                pipeline=pipeline_stats.snapshot(),
+                completed_at=datetime.utcnow()
+            )
             
             logger.info(f"Scraping task {job_id} completed: {successful_results} successful, {failed_results} failed")
             
         except Exception as e:
             logger.error(f"Scraping task {job_id} failed: {e}")
-            job_model.update_job(job_id, {
-                'status': 'failed',
-                'error_message': str(e),
-                'completed_at': datetime.utcnow()
-            })
+            if cancel_token.lease_lost:
+                return
+            progress.flush(
+                status='failed',
+                error_message=str(e),
+                completed_at=datetime.utcnow()
+            )
         finally:
             # Remove from running tasks
             if job_id in self.running_tasks:
                 del self.running_tasks[job_id]
     
-    def start_search_task(self, job_id: str, query: str, max_results: int = 20) -> str:
-        """Start a DuckDuckGo search task"""
+    def start_search_task(self, job_id: str, query: str, max_results: int = 20,
+                          priority: str = None) -> str:
+        """Queue a DuckDuckGo search task for the job workers"""
+        self.job_queue.enqueue(job_id, 'search', {'query': query, 'max_results': max_results}, priority)
+        return job_id
+    
+    def run_search_task(self, job_id: str, payload: Dict):
+        """Run a queued search task (called by a job worker)"""
         from models import ScrapingJob
         
         job_model = ScrapingJob(self.db)
@@ -130,16 +183,8 @@ class TaskManager:
             'started_at': datetime.utcnow()
         })
         
-        # Start search in background thread
-        thread = threading.Thread(
-            target=self._run_search_task,
-            args=(job_id, query, max_results, job_model)
-        )
-        thread.daemon = True
-        thread.start()
-        
-        self.running_tasks[job_id] = thread
-        return job_id
+        self.running_tasks[job_id] = None
+        self._run_search_task(job_id, payload['query'], payload.get('max_results', 20), job_model)
     
     def _run_search_task(self, job_id: str, query: str, max_results: int, job_model):
         """Run the actual search task"""
@@ -178,15 +223,15 @@ class TaskManager:
         job = job_model.get_job(job_id)
         
         if job:
-            job['is_running'] = job_id in self.running_tasks
+            # Jobs run in worker processes, so the job document is the source of truth
+            job['is_running'] = job.get('status') == 'running'
         
         return job
     
     def cancel_task(self, job_id: str) -> bool:
-        """Cancel a running task"""
-        if job_id in self.running_tasks:
-            # Note: Python threads can't be forcibly terminated
-            # This would require a more sophisticated cancellation mechanism
-            logger.warning(f"Task {job_id} cancellation requested (graceful stop not implemented)")
-            return True
-        return False
+        """Cancel a queued or running task"""
+        # A queued job is dropped; a worker running it stops at its next heartbeat,
+        # or right away when it runs in this process, and saves what it has
+        self.job_queue.cancel(job_id)
+        cancel_job(job_id)
+        return True
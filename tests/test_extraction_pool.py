@@ -0,0 +1,44 @@
+import threading
+from concurrent.futures import Future
+from extraction_pool import ExtractionPool, extract_batch
+from parsed_page import ParsedPage
+
+class BlockingBatchScraper:
+    """Extracts pages only once the test opens the gate"""
+    contact_extractor = None
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def extract_page(self, url, page, adapter_config, task_type, plan):
+        self.started.set()
+        self.gate.wait(5)
+        return {'url': url}
+
+class CancelledWhileResolving(Future):
+    """Its job cancels it from another thread just as the pool hands over the result"""
+
+    def set_result(self, result):
+        self.cancel()
+        super().set_result(result)
+
+def test_cancelling_pages_mid_batch_still_resolves_the_rest():
+    pool = ExtractionPool(workers=0, queue_size=8, batch_deadline=0)
+    scraper = BlockingBatchScraper()
+    futures = [Future(), Future(), CancelledWhileResolving(), Future()]
+    batch = [(0, (f"http://example.com/{i}", ParsedPage(f"http://example.com/{i}", text='<p></p>'), {}, 'general'),
+              future, scraper) for i, future in enumerate(futures)]
+    try:
+        pool._submit(extract_batch, scraper, batch)
+        assert scraper.started.wait(5)
+        futures[1].cancel()
+        scraper.gate.set()
+
+        assert futures[0].result(timeout=5) == {'url': 'http://example.com/0'}
+        assert futures[3].result(timeout=5) == {'url': 'http://example.com/3'}
+        assert futures[1].cancelled() and futures[2].cancelled()
+        assert pool.stats()['batches_in_flight'] == 0
+    finally:
+        scraper.gate.set()
+        pool.reset()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Job worker processes
+Lease jobs from the durable job queue and run them, up to JOB_CONCURRENCY
+jobs per process at a time sharing the process's global limits. A worker
+heartbeats each lease while its job runs; if it dies, the job is re-delivered
+to another worker once the lease expires.
+
+Usage: python worker.py [--workers N]
+"""
+
+import os
+import time
+import signal
+import socket
+import logging
+import argparse
+import threading
+import multiprocessing
+from typing import Dict, List, Optional
+from config import Config
+from cancellation import LEASE_LOST, register_job, unregister_job
+from governor import job_share
+from job_queue import DONE, FAILED, CANCELLED
+
+logger = logging.getLogger(__name__)
+
+def run_job(services, job: Dict, cancel_token):
+    """Run one leased job with the shared scraping services"""
+    kind, job_id, payload = job['kind'], job['job_id'], job['payload']
+    # Requests, tabs and extraction slots are shared with the other running jobs by priority
+    with job_share(job_id, job.get('priority')):
+        if kind == 'scrape':
+            services.task_manager.run_scraping_task(job_id, payload, cancel_token)
+        elif kind == 'search':
+            services.task_manager.run_search_task(job_id, payload)
+        elif kind == 'job_scraping':
+            services.real_time_scraper.run_job_scraping(job_id, payload, cancel_token)
+        elif kind == 'lead_generation':
+            services.real_time_scraper.run_lead_scraping(job_id, payload, cancel_token)
+        elif kind == 'generic':
+            from routes.api import _run_generic_scraping
+            _run_generic_scraping(job_id, payload, services.db, services, cancel_token)
+        else:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+class JobWorker:
+    """Leases up to `concurrency` jobs at a time and runs each on its own thread until stopped"""
+
+    def __init__(self, services, queue=None, worker_id: Optional[str] = None,
+                 concurrency: Optional[int] = None):
+        self.services = services
+        self.queue = queue or services.job_queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+        self.concurrency = concurrency or Config.JOB_CONCURRENCY
+        self.free = threading.Semaphore(self.concurrency)
+        self.stopping = threading.Event()
+        self.tokens = {}  # running jobs' cancellation tokens, by job_id
+
+    def run(self):
+        logger.info(f"Worker {self.worker_id} started")
+        threads = []
+        while not self.stopping.is_set():
+            if not self.free.acquire(timeout=Config.JOB_POLL_INTERVAL):
+                continue
+            try:
+                job = self.queue.lease(self.worker_id)
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} could not lease a job: {e}")
+                job = None
+            if job is None:
+                self.free.release()
+                self.stopping.wait(Config.JOB_POLL_INTERVAL)
+                continue
+            thread = threading.Thread(target=self._run_and_free, args=(job,), name=f"job-{job['job_id']}",
+                                      daemon=True)
+            thread.start()
+            threads = [t for t in threads if t.is_alive()] + [thread]
+        for thread in threads:
+            thread.join()
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def stop(self):
+        """Stop leasing; running jobs are cancelled and handed back to the queue"""
+        self.stopping.set()
+        for token in list(self.tokens.values()):
+            token.cancel()
+
+    def _run_and_free(self, job: Dict):
+        try:
+            self._run(job)
+        finally:
+            self.free.release()
+
+    def _run(self, job: Dict):
+        from models import ScrapingJob
+
+        job_id = job['job_id']
+        if job['attempts'] > Config.JOB_MAX_ATTEMPTS:
+            logger.error(f"Job {job_id} failed after {Config.JOB_MAX_ATTEMPTS} attempts")
+            self.queue.finish(job_id, self.worker_id, FAILED, 'too many attempts')
+            ScrapingJob(self.services.db).update_job(job_id, {
+                'status': 'failed',
+                'error_message': f"Worker died {Config.JOB_MAX_ATTEMPTS} times while running this job"
+            })
+            return
+        if job['attempts'] > 1:
+            logger.warning(f"Job {job_id} re-delivered (attempt {job['attempts']})")
+
+        token = register_job(job_id)
+        self.tokens[job_id] = token
+        if self.stopping.is_set():
+            token.cancel()
+        lost_lease = threading.Event()
+        heartbeat_done = threading.Event()
+
+        def heartbeat():
+            # Cancellation is polled every JOB_CANCEL_POLL_INTERVAL; the lease is renewed less often
+            last_heartbeat = time.monotonic()
+            while not heartbeat_done.wait(Config.JOB_CANCEL_POLL_INTERVAL):
+                try:
+                    if self.queue.cancel_requested(job_id):
+                        logger.info(f"Job {job_id} cancelled through the queue")
+                        lost_lease.set()
+                        token.cancel()
+                        return
+                    if time.monotonic() - last_heartbeat < Config.JOB_HEARTBEAT_INTERVAL:
+                        continue
+                    last_heartbeat = time.monotonic()
+                    if not self.queue.heartbeat(job_id, self.worker_id):
+                        # The lease went to another worker
+                        lost_lease.set()
+                        token.cancel(LEASE_LOST)
+                        return
+                except Exception as e:
+                    logger.error(f"Heartbeat failed for job {job_id}: {e}")
+
+        heartbeat_thread = threading.Thread(target=heartbeat, name=f'heartbeat-{job_id}', daemon=True)
+        heartbeat_thread.start()
+        try:
+            run_job(self.services, job, token)
+            if self.stopping.is_set() and token.cancelled and not lost_lease.is_set():
+                # Shutting down mid-job: let another worker pick it up now instead of after the lease
+                self.queue.release(job_id, self.worker_id)
+                ScrapingJob(self.services.db).update_job(job_id, {'status': 'pending'})
+            else:
+                self.queue.finish(job_id, self.worker_id, CANCELLED if token.cancelled else DONE)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed in worker {self.worker_id}: {e}")
+            self.queue.finish(job_id, self.worker_id, FAILED, str(e))
+        finally:
+            heartbeat_done.set()
+            heartbeat_thread.join()
+            self.tokens.pop(job_id, None)
+            unregister_job(job_id)
+
+def start_embedded_workers(services, count: Optional[int] = None) -> List[JobWorker]:
+    """Run workers as threads inside this process.
+
+    Needed when there is no shared MongoDB (the mock database lives in the API
+    process); by default embedded workers start only in that case.
+    """
+    if services.db is None:
+        # No database at all (MongoDB is down): every job would fail and burn its attempts
+        logger.warning("No database; embedded job workers not started")
+        return []
+    if count is None:
+        if Config.JOB_EMBEDDED_WORKERS is not None:
+            count = int(Config.JOB_EMBEDDED_WORKERS)
+        else:
+            from job_queue import MongoJobQueue
+            count = 0 if isinstance(services.job_queue, MongoJobQueue) else Config.JOB_WORKERS
+
+    workers = [JobWorker(services) for _ in range(count)]
+    for i, worker in enumerate(workers):
+        threading.Thread(target=worker.run, name=f'job-worker-{i}', daemon=True).start()
+    return workers
+
+def connect_database():
+    """Connect to the MongoDB instance the API uses"""
+    from pymongo import MongoClient
+
+    client = MongoClient(os.environ.get('MONGODB_URI', Config.MONGODB_URI), serverSelectionTimeoutMS=3000)
+    client.admin.command('ping')
+    return client[os.environ.get('MONGODB_DATABASE', Config.DATABASE_NAME)]
+
+def run_worker_process():
+    """Entry point of one worker process"""
+    from container import ServiceContainer
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    worker = JobWorker(ServiceContainer(connect_database()))
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    worker.run()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=Config.JOB_WORKERS)
+    args = parser.parse_args()
+    # Children size their extraction pools from the real process count
+    os.environ['JOB_WORKER_PROCESSES'] = str(args.workers)
+
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=run_worker_process, name=f'job-worker-{i}')
+                 for i in range(args.workers)]
+    for process in processes:
+        process.start()
+
+    def stop(*_):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()  # SIGTERM: finish up and hand the job back
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for process in processes:
+        process.join()
+
+if __name__ == '__main__':
+    main()